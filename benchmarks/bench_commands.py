@@ -0,0 +1,327 @@
+"""Micro-benchmarks for the slash command handlers.
+
+    python -m benchmarks.bench_commands                 run and compare
+    python -m benchmarks.bench_commands --save          store a new baseline
+    python -m benchmarks.bench_commands warn checkwarns only these commands
+
+Each handler is called directly with a fake Interaction, so the numbers
+cover the handler's own work: no gateway, no REST and no command tree
+dispatch. Wall time and allocations are measured in separate passes
+because tracemalloc slows everything it traces. Against a saved baseline,
+a median time or allocation increase beyond --threshold is a regression
+and makes the run exit with status 1.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import discord
+from discord import app_commands
+
+BASELINE_PATH = ".bench_commands.json"
+# Sub-microsecond handlers jitter by more than the threshold on their own
+MIN_DELTA_US = 0.5
+
+
+class FakeResponse:
+    __slots__ = ("_done", )
+
+    def __init__(self):
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def send_message(self, content=None, **kwargs):
+        self._done = True
+
+    async def defer(self, **kwargs):
+        self._done = True
+
+
+class FakeMessageable:
+    __slots__ = ("id", "mention")
+
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.mention = f"<#{channel_id}>"
+
+    async def send(self, content=None, **kwargs):
+        pass
+
+
+class FakeGuild:
+    __slots__ = ("id", "name", "owner_id", "member_count", "created_at",
+                 "icon", "shard_id")
+
+    def __init__(self, guild_id, member_count):
+        self.id = guild_id
+        self.name = "Village"
+        self.owner_id = guild_id + 1
+        self.member_count = member_count
+        self.created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.icon = None
+        self.shard_id = 0
+
+
+class FakeMember:
+    __slots__ = ("id", "name", "mention", "guild", "guild_permissions")
+
+    def __init__(self, user_id, guild, permissions):
+        self.id = user_id
+        self.name = f"villager{user_id}"
+        self.mention = f"<@{user_id}>"
+        self.guild = guild
+        self.guild_permissions = permissions
+
+    def __str__(self):
+        return self.name
+
+
+class FakeInteraction:
+    __slots__ = ("client", "user", "guild", "channel", "response", "followup")
+
+    def __init__(self, client, user, guild, channel):
+        self.client = client
+        self.user = user
+        self.guild = guild
+        self.channel = channel
+        self.response = FakeResponse()
+        self.followup = FakeMessageable(channel.id)
+
+
+class FakeShard:
+    latency = 0.042
+
+
+class Fixture:
+    """A guild full of fake members and the bot the handlers run against."""
+
+    def __init__(self, bot, members=5000):
+        self.bot = bot
+        self.guild = FakeGuild(1, members)
+        self.channel = FakeMessageable(2)
+        moderator = discord.Permissions(kick_members=True)
+        self.moderator = FakeMember(3, self.guild, moderator)
+        self.members = [
+            FakeMember(1000 + n, self.guild, discord.Permissions.none())
+            for n in range(members)
+        ]
+        self._targets = itertools.cycle(self.members)
+        self._issues = itertools.count()
+
+    def interaction(self):
+        return FakeInteraction(self.bot, self.moderator, self.guild,
+                               self.channel)
+
+    def target(self):
+        return next(self._targets)
+
+    def issue(self):
+        return f"Issue #{next(self._issues)}: the iron golem is stuck"
+
+
+async def give_warn(fixture, member):
+    now = datetime.now().timestamp()
+    await fixture.bot.warn_store.add(fixture.guild.id, member.id, now)
+    fixture.bot.warn_cache.clear(fixture.guild.id, member.id)
+
+
+# Command name -> function building the keyword arguments for one call,
+# plus an optional untimed setup coroutine run before each call
+CASES = {
+    "hello": (lambda f: {}, None),
+    "ping": (lambda f: {}, None),
+    "serverinfo": (lambda f: {}, None),
+    "report": (lambda f: {"issue": f.issue()}, None),
+    "speak": (lambda f: {"message": "Hrmm!"}, None),
+    "fight": (lambda f: {"user": f.target(), "attack": "sword"}, None),
+    "coinflip": (lambda f: {}, None),
+    "8ball": (lambda f: {"question": "Will it rain?"}, None),
+    "choice": (lambda f: {"choice1": "wheat", "choice2": "carrots",
+                          "choice3": "potatoes"}, None),
+    "warn": (lambda f: {"user": f.target(), "reason": "griefing"}, None),
+    "removewarns": (lambda f: {"user": f.members[0], "amount": 1},
+                    lambda f: give_warn(f, f.members[0])),
+    "checkwarns": (lambda f: {"user": f.target()}, None),
+    "slap": (lambda f: {"user": f.target(),
+                        "tool": app_commands.Choice(name="Fish",
+                                                    value="Fish")}, None),
+}
+
+
+async def invoke(command, interaction, kwargs):
+    if command.binding is not None:
+        await command.callback(command.binding, interaction, **kwargs)
+    else:
+        await command.callback(interaction, **kwargs)
+
+
+async def measure(fixture, command, build, setup, iterations):
+    times = []
+    for _ in range(iterations):
+        kwargs = build(fixture)
+        if setup is not None:
+            await setup(fixture)
+        interaction = fixture.interaction()
+        started = time.perf_counter_ns()
+        await invoke(command, interaction, kwargs)
+        times.append(time.perf_counter_ns() - started)
+    return times
+
+
+async def measure_allocations(fixture, command, build, setup, iterations):
+    peaks = []
+    blocks = []
+    tracemalloc.start()
+    try:
+        for _ in range(iterations):
+            kwargs = build(fixture)
+            if setup is not None:
+                await setup(fixture)
+            interaction = fixture.interaction()
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            await invoke(command, interaction, kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            peaks.append(peak - base)
+            blocks.append(sum(stat.count_diff for stat in
+                              after.compare_to(before, "filename")
+                              if stat.count_diff > 0))
+    finally:
+        tracemalloc.stop()
+    return peaks, blocks
+
+
+async def run_cases(bot, names, iterations, alloc_iterations):
+    fixture = Fixture(bot)
+    results = {}
+    for name in names:
+        command = bot.tree.get_command(name)
+        build, setup = CASES[name]
+        # Warm caches so the first call's fetches don't skew the median
+        await measure(fixture, command, build, setup, max(1, iterations // 10))
+        times = await measure(fixture, command, build, setup, iterations)
+        peaks, blocks = await measure_allocations(fixture, command, build,
+                                                  setup, alloc_iterations)
+        results[name] = {
+            "median_us": statistics.median(times) / 1000,
+            "p95_us": sorted(times)[int(len(times) * 0.95)] / 1000,
+            "peak_bytes": statistics.median(peaks),
+            "new_blocks": statistics.median(blocks),
+        }
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for key in ("median_us", "peak_bytes"):
+            if key == "median_us" and result[key] - previous[key] < MIN_DELTA_US:
+                continue
+            if previous[key] and result[key] > previous[key] * (1 + threshold):
+                regressions.append(
+                    f"{name}: {key} {previous[key]:.1f} -> {result[key]:.1f} "
+                    f"(+{(result[key] / previous[key] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_results(results, baseline):
+    print(f"{'command':<14}{'median':>10}{'p95':>10}{'peak alloc':>12}"
+          f"{'blocks':>8}{'vs base':>9}")
+    for name, result in results.items():
+        previous = baseline.get(name)
+        change = (f"{(result['median_us'] / previous['median_us'] - 1) * 100:+.0f}%"
+                  if previous and previous["median_us"] else "")
+        print(f"{name:<14}{result['median_us']:>8.1f}us{result['p95_us']:>8.1f}us"
+              f"{result['peak_bytes'] / 1024:>9.1f}KiB{result['new_blocks']:>8.0f}"
+              f"{change:>9}")
+
+
+def configure_environment(workdir):
+    os.environ.update({
+        "DISCORD_BOT_TOKEN": "fake-token",
+        "METRICS_PORT": "0",
+        "WARN_DB_PATH": os.path.join(workdir, "warns.db"),
+        "COMMAND_MANIFEST_PATH": os.path.join(workdir, "manifest.json"),
+        "ESCALATION_POLICY_PATH": os.path.join(workdir, "escalation.json"),
+        # Nothing drains the report queue here, don't let it fill up
+        "REPORT_QUEUE_SIZE": str(10**7),
+    })
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+async def fake_application_info():
+    return SimpleNamespace(owner=SimpleNamespace(name="developer"))
+
+
+async def run(args):
+    configure_environment(tempfile.mkdtemp(prefix="villager-bench-"))
+    import main
+    from utils.ttl_cache import CachedValue
+
+    bot = main.bot
+    bot.app_info = CachedValue(fake_application_info, main.APP_INFO_TTL)
+    bot.get_shard = lambda shard_id: FakeShard()
+    bot.escalation.load()
+    # Offline: don't let the utility cog fetch report targets or deliver
+    bot.reports_started = True
+    # The moderation cog opens the warn store as it loads
+    await bot.load_extensions()
+    try:
+        names = args.commands or list(CASES)
+        unknown = [name for name in names if name not in CASES]
+        if unknown:
+            raise SystemExit(f"No benchmark for: {', '.join(unknown)}")
+        results = await run_cases(bot, names, args.iterations,
+                                  args.alloc_iterations)
+    finally:
+        bot.sweep_warns.cancel()
+        await bot.warn_store.close()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({**baseline, **results}, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("commands", nargs="*", help="default: all")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--alloc-iterations", type=int, default=100)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true",
+                        help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown, 0.25 = 25%%")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
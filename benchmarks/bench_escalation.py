@@ -0,0 +1,45 @@
+"""Compare the compiled escalation table with the old inline ladder.
+
+    python -m benchmarks.bench_escalation
+"""
+import timeit
+from datetime import timedelta
+
+from utils.escalation import DEFAULT_POLICY, compile_policy
+
+
+def inline(warnings):
+    # The ladder /warn used before escalation policies existed
+    if 1 < warnings <= 4:
+        return "timeout", timedelta(
+            days=1 if warnings == 2 else 7 if warnings == 3 else 3)
+    if warnings == 5:
+        return "ban", None
+    return None
+
+
+def main(number=200_000):
+    policy = compile_policy(DEFAULT_POLICY)
+    counts = list(range(1, 8))
+
+    for warnings in counts:
+        step = policy.lookup(warnings)
+        assert inline(warnings) == (tuple(step) if step else None), warnings
+
+    def run_inline():
+        for warnings in counts:
+            inline(warnings)
+
+    def run_policy():
+        lookup = policy.lookup
+        for warnings in counts:
+            lookup(warnings)
+
+    for name, fn in (("inline", run_inline), ("policy", run_policy)):
+        seconds = min(timeit.repeat(fn, number=number, repeat=5))
+        per_call = seconds / (number * len(counts)) * 1e9
+        print(f"{name:>8}: {per_call:7.1f} ns per lookup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Cold-start benchmark against benchmarks/fake_discord.py.
+
+    python -m benchmarks.bench_startup --runs 5 --guilds 2000 --shards 2
+
+Starts `python main.py` in a fresh process for every run, so interpreter
+startup and imports are paid each time, and waits for the startup profile
+it writes once ready (STARTUP_PROFILE_PATH). Prints each boot phase's
+median, min and max across runs. Every run gets an empty command manifest
+and syncs, like a first deploy, unless --reuse-manifest is given.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_discord import FakeDiscord
+
+
+async def cold_start(server, args, workdir, run):
+    profile_path = os.path.join(workdir, f"startup-{run}.json")
+    manifest = "manifest.json" if args.reuse_manifest else f"manifest-{run}.json"
+    env = dict(os.environ)
+    env.update({
+        "DISCORD_BOT_TOKEN": "fake-token",
+        "DISCORD_API_BASE": server.api_base,
+        "DISCORD_GATEWAY_URL": server.gateway_url,
+        "SHARD_COUNT": str(args.shards),
+        "METRICS_PORT": "0",
+        "WARN_DB_PATH": os.path.join(workdir, "warns.db"),
+        "COMMAND_MANIFEST_PATH": os.path.join(workdir, manifest),
+        "ESCALATION_POLICY_PATH": os.path.join(workdir, "escalation.json"),
+        "STARTUP_PROFILE_PATH": profile_path,
+        "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+    })
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(sys.executable, "main.py",
+                                                   env=env)
+    try:
+        while not os.path.exists(profile_path):
+            if process.returncode is not None:
+                raise RuntimeError(
+                    f"main.py exited with code {process.returncode}")
+            if time.perf_counter() - started > args.timeout:
+                raise TimeoutError(f"Not ready after {args.timeout:.0f} s")
+            await asyncio.sleep(0.01)
+        wall = time.perf_counter() - started
+        # The profile is written from a thread, let it finish
+        await asyncio.sleep(0.05)
+        with open(profile_path) as f:
+            profile = json.load(f)
+    finally:
+        if process.returncode is None:
+            process.terminate()
+        await process.wait()
+    profile["wall"] = wall
+    return profile
+
+
+def print_report(profiles):
+    phases = list(profiles[0]["phases"])
+    print(f"{'phase':<12}{'median':>10}{'min':>10}{'max':>10}")
+    for phase in phases:
+        values = [profile["phases"].get(phase, 0.0) for profile in profiles]
+        print(f"{phase:<12}{statistics.median(values) * 1000:>8.0f}ms"
+              f"{min(values) * 1000:>8.0f}ms{max(values) * 1000:>8.0f}ms")
+    for key, label in (("total", "profiled"), ("wall", "wall clock")):
+        values = [profile[key] for profile in profiles]
+        print(f"{label:<12}{statistics.median(values) * 1000:>8.0f}ms"
+              f"{min(values) * 1000:>8.0f}ms{max(values) * 1000:>8.0f}ms")
+    shards = profiles[0]["shards"]
+    if len(shards) > 1:
+        print("per shard (first run, seconds since start):")
+        for shard_id, marks in shards.items():
+            print(f"  #{shard_id}: " + ", ".join(
+                f"{phase} {at:.2f}" for phase, at in marks.items()))
+
+
+async def run(args):
+    server = FakeDiscord(args.guilds, args.members, args.shards)
+    await server.start()
+    workdir = tempfile.mkdtemp(prefix="villager-startup-")
+    profiles = []
+    try:
+        for run in range(args.runs):
+            profile = await cold_start(server, args, workdir, run)
+            profiles.append(profile)
+            print(f"run {run + 1}/{args.runs}: ready in "
+                  f"{profile['total']:.2f} s ({profile['wall']:.2f} s wall)")
+    finally:
+        await server.stop()
+    print_report(profiles)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(profiles, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--guilds", type=int, default=100)
+    parser.add_argument("--members", type=int, default=20)
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument("--reuse-manifest", action="store_true",
+                        help="skip the command sync after the first run")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", help="also write every run's profile "
+                        "to this JSON file")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,475 @@
+"""A local stand-in for the Discord gateway and REST API.
+
+Serves just enough of both for Villager to log in, identify every shard,
+receive synthetic guilds and answer synthetic interactions, while
+recording every REST call it makes. Point the bot at it with
+DISCORD_API_BASE and DISCORD_GATEWAY_URL, see benchmarks/load_test.py.
+"""
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+
+from aiohttp import WSMsgType, web
+
+APPLICATION_ID = 1000
+BOT_USER_ID = 1001
+EVERYONE_PERMISSIONS = "1071698660929"
+ADMIN_PERMISSIONS = "2251799813685247"
+HEARTBEAT_INTERVAL = 41250
+
+
+def json_response(data, status=200):
+    # discord.py only decodes an exact "application/json" content type,
+    # aiohttp's json_response() appends a charset
+    return web.Response(body=json.dumps(data).encode(), status=status,
+                        headers={"Content-Type": "application/json"})
+
+
+def snowflake(index, kind=0):
+    # Keeps (id >> 22) == 1_000_000 + index, so guild N lands on shard
+    # (1_000_000 + N) % shard_count just like a real guild would
+    return ((1_000_000 + index) << 22) | kind
+
+
+def user_payload(user_id, name):
+    return {
+        "id": str(user_id),
+        "username": name,
+        "global_name": name,
+        "discriminator": "0",
+        "avatar": None,
+        "bot": user_id == BOT_USER_ID,
+    }
+
+
+def member_payload(user, permissions=None):
+    member = {
+        "user": user,
+        "roles": [],
+        "joined_at": "2024-01-01T00:00:00+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+    if permissions is not None:
+        member["permissions"] = permissions
+    return member
+
+
+class FakeGuild:
+    __slots__ = ("index", "id", "channel_id", "owner_id", "members")
+
+    def __init__(self, index, member_count):
+        self.index = index
+        self.id = snowflake(index, 1)
+        self.channel_id = snowflake(index, 2)
+        self.members = [
+            user_payload(snowflake(index * member_count + n, 3), f"villager{n}")
+            for n in range(member_count)
+        ]
+        self.owner_id = self.members[0]["id"] if self.members else str(
+            BOT_USER_ID)
+
+    def shard_id(self, shard_count):
+        return (self.id >> 22) % shard_count
+
+    def channel(self):
+        return {
+            "id": str(self.channel_id),
+            "type": 0,
+            "guild_id": str(self.id),
+            "name": "general",
+            "position": 0,
+            "permission_overwrites": [],
+            "nsfw": False,
+        }
+
+    def payload(self):
+        members = [member_payload(user) for user in self.members]
+        members.append(member_payload(user_payload(BOT_USER_ID, "Villager")))
+        return {
+            "id": str(self.id),
+            "name": f"Village {self.index}",
+            "icon": None,
+            "owner_id": self.owner_id,
+            "member_count": len(members),
+            "members": members,
+            "channels": [self.channel()],
+            "threads": [],
+            "roles": [{
+                "id": str(self.id),
+                "name": "@everyone",
+                "permissions": EVERYONE_PERMISSIONS,
+                "position": 0,
+                "color": 0,
+                "hoist": False,
+                "managed": False,
+                "mentionable": False,
+                "flags": 0,
+            }],
+            "emojis": [],
+            "stickers": [],
+            "features": [],
+            "presences": [],
+            "voice_states": [],
+            "stage_instances": [],
+            "guild_scheduled_events": [],
+            "large": len(members) > 250,
+            "unavailable": False,
+            "verification_level": 0,
+            "default_message_notifications": 0,
+            "explicit_content_filter": 0,
+            "mfa_level": 0,
+            "nsfw_level": 0,
+            "premium_tier": 0,
+            "preferred_locale": "en-US",
+            "joined_at": "2024-01-01T00:00:00+00:00",
+        }
+
+
+class FakeDiscord:
+    """Fake gateway and REST endpoints served from one aiohttp app.
+
+    Every REST request is appended to `calls` as (method, route, path,
+    monotonic time). Interaction callbacks also close out the matching
+    entry in `pending`, giving send-to-response latencies in `latencies`.
+    """
+
+    def __init__(self, guilds=10, members=50, shard_count=1,
+                 host="127.0.0.1", port=0):
+        self.guilds = [FakeGuild(index, members) for index in range(guilds)]
+        self.shard_count = shard_count
+        self.host = host
+        self.port = port
+        self.calls = []
+        self.sockets = {}
+        self.pending = {}
+        self.latencies = []
+        self.responded = asyncio.Event()
+        self._ids = itertools.count()
+        self._runner = None
+
+        app = web.Application()
+        app.router.add_get("/gateway", self.gateway)
+        api = web.RouteTableDef()
+        api.get("/api/v10/gateway")(self.get_gateway)
+        api.get("/api/v10/gateway/bot")(self.get_gateway_bot)
+        api.get("/api/v10/users/@me")(self.get_me)
+        api.get("/api/v10/oauth2/applications/@me")(self.get_application)
+        api.get("/api/v10/users/{user_id}")(self.get_user)
+        api.post("/api/v10/users/@me/channels")(self.create_dm)
+        api.put("/api/v10/applications/{application_id}/commands")(
+            self.bulk_commands)
+        api.put("/api/v10/applications/{application_id}/guilds/{guild_id}"
+                "/commands")(self.bulk_commands)
+        api.post("/api/v10/interactions/{interaction_id}/{token}/callback")(
+            self.interaction_callback)
+        api.route("*", "/api/v10/webhooks/{application_id}/{token}{tail:.*}")(
+            self.webhook)
+        api.post("/api/v10/channels/{channel_id}/messages")(
+            self.create_message)
+        api.patch("/api/v10/guilds/{guild_id}/members/{user_id}")(
+            self.edit_member)
+        api.delete("/api/v10/guilds/{guild_id}/members/{user_id}")(
+            self.no_content)
+        api.put("/api/v10/guilds/{guild_id}/bans/{user_id}")(self.no_content)
+        api.route("*", "/api/v10/{tail:.*}")(self.unknown)
+        app.add_routes(api)
+        app.middlewares.append(self.record)
+        self.app = app
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def api_base(self):
+        return f"{self.url}/api/v10"
+
+    @property
+    def gateway_url(self):
+        return f"ws://{self.host}:{self.port}/gateway"
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        for ws in list(self.sockets.values()):
+            await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def record(self, request, handler):
+        if request.path == "/gateway":
+            return await handler(request)
+        route = request.match_info.route.resource
+        self.calls.append((request.method,
+                           route.canonical if route else request.path,
+                           request.path, time.monotonic()))
+        return await handler(request)
+
+    def call_counts(self):
+        return Counter(f"{method} {route}" for method, route, _, _ in self.calls)
+
+    # REST
+
+    async def get_gateway(self, request):
+        return json_response({"url": self.gateway_url})
+
+    async def get_gateway_bot(self, request):
+        return json_response({
+            "url": self.gateway_url,
+            "shards": self.shard_count,
+            "session_start_limit": {
+                "total": 1000,
+                "remaining": 1000,
+                "reset_after": 0,
+                "max_concurrency": 16,
+            },
+        })
+
+    async def get_me(self, request):
+        return json_response(user_payload(BOT_USER_ID, "Villager"))
+
+    async def get_application(self, request):
+        return json_response({
+            "id": str(APPLICATION_ID),
+            "name": "Villager",
+            "icon": None,
+            "description": "",
+            "bot_public": True,
+            "bot_require_code_grant": False,
+            "verify_key": "",
+            "flags": 0,
+            "owner": user_payload(947551947735576627, "developer"),
+            "team": None,
+        })
+
+    async def get_user(self, request):
+        user_id = int(request.match_info["user_id"])
+        return json_response(user_payload(user_id, f"user{user_id}"))
+
+    async def create_dm(self, request):
+        body = await request.json()
+        recipient = int(body["recipient_id"])
+        return json_response({
+            "id": str(recipient + 1),
+            "type": 1,
+            "last_message_id": None,
+            "recipients": [user_payload(recipient, f"user{recipient}")],
+        })
+
+    async def bulk_commands(self, request):
+        commands = await request.json()
+        for command in commands:
+            command.setdefault("id", str(snowflake(next(self._ids), 4)))
+            command["application_id"] = str(APPLICATION_ID)
+            command["version"] = "1"
+        return json_response(commands)
+
+    async def interaction_callback(self, request):
+        interaction_id = int(request.match_info["interaction_id"])
+        sent_at = self.pending.pop(interaction_id, None)
+        if sent_at is not None:
+            self.latencies.append(time.monotonic() - sent_at)
+            if not self.pending:
+                self.responded.set()
+        if request.content_type == "application/json":
+            body = await request.json()
+        else:
+            # Multipart, sent when the response has attachments
+            await request.read()
+            body = {"type": 4, "data": {}}
+        data = body.get("data") or {}
+        message = None
+        if body["type"] in (4, 7):
+            message = self.message_payload(0, data.get("content"))
+            message["interaction_metadata"] = {
+                "id": str(interaction_id),
+                "type": 2,
+                "user": user_payload(BOT_USER_ID, "Villager"),
+                "authorizing_integration_owners": {},
+            }
+        resource = {"type": body["type"]}
+        if message is not None:
+            resource["message"] = message
+        return json_response({
+            "interaction": {
+                "id": str(interaction_id),
+                "type": 2,
+                "response_message_id": message["id"] if message else None,
+                "response_message_loading": body["type"] == 5,
+                "response_message_ephemeral": bool(data.get("flags", 0) & 64),
+            },
+            "resource": resource,
+        })
+
+    def message_payload(self, channel_id, content):
+        return {
+            "id": str(snowflake(next(self._ids), 5)),
+            "channel_id": str(channel_id),
+            "author": user_payload(BOT_USER_ID, "Villager"),
+            "content": content or "",
+            "timestamp": "2024-01-01T00:00:00+00:00",
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "pinned": False,
+            "type": 0,
+        }
+
+    async def webhook(self, request):
+        if request.method == "DELETE":
+            return web.Response(status=204)
+        body = await request.json() if request.can_read_body else {}
+        return json_response(
+            self.message_payload(0, body.get("content")))
+
+    async def create_message(self, request):
+        body = await request.json()
+        return json_response(
+            self.message_payload(request.match_info["channel_id"],
+                                 body.get("content")))
+
+    async def edit_member(self, request):
+        body = await request.json()
+        user_id = int(request.match_info["user_id"])
+        member = member_payload(user_payload(user_id, f"user{user_id}"))
+        member["communication_disabled_until"] = body.get(
+            "communication_disabled_until")
+        return json_response(member)
+
+    async def no_content(self, request):
+        return web.Response(status=204)
+
+    async def unknown(self, request):
+        return json_response({"message": "404: Not Found", "code": 0},
+                                 status=404)
+
+    # Gateway
+
+    async def gateway(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        sequence = itertools.count(1)
+        shard_id = None
+        await ws.send_json({"op": 10, "d": {
+            "heartbeat_interval": HEARTBEAT_INTERVAL
+        }})
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    break
+                payload = json.loads(message.data)
+                op = payload["op"]
+                if op == 1:
+                    await ws.send_json({"op": 11})
+                elif op == 2:
+                    shard_id, _ = payload["d"].get("shard", (0, 1))
+                    self.sockets[shard_id] = ws
+                    await self.stream_guilds(ws, shard_id, sequence)
+                elif op == 6:
+                    # Sessions aren't kept, make the client identify again
+                    await ws.send_json({"op": 9, "d": False})
+        finally:
+            if self.sockets.get(shard_id) is ws:
+                del self.sockets[shard_id]
+        return ws
+
+    async def dispatch(self, ws, event, data, sequence):
+        await ws.send_json({"op": 0, "t": event, "s": next(sequence),
+                            "d": data})
+
+    async def stream_guilds(self, ws, shard_id, sequence):
+        guilds = [guild for guild in self.guilds
+                  if guild.shard_id(self.shard_count) == shard_id]
+        await self.dispatch(ws, "READY", {
+            "v": 10,
+            "user": user_payload(BOT_USER_ID, "Villager"),
+            "guilds": [{"id": str(guild.id), "unavailable": True}
+                       for guild in guilds],
+            "session_id": f"session-{shard_id}",
+            "resume_gateway_url": self.gateway_url,
+            "shard": [shard_id, self.shard_count],
+            "application": {"id": str(APPLICATION_ID), "flags": 0},
+            "private_channels": [],
+            "relationships": [],
+        }, sequence)
+        for guild in guilds:
+            await self.dispatch(ws, "GUILD_CREATE", guild.payload(), sequence)
+
+    # Interactions
+
+    def interaction(self, guild, name, options=None, user=None,
+                    permissions=ADMIN_PERMISSIONS):
+        """Build an INTERACTION_CREATE payload for slash command `name`.
+
+        `options` maps option names to values. User option values are
+        given as user payloads and are added to the resolved data.
+        """
+        user = user or guild.members[0]
+        interaction_id = snowflake(next(self._ids), 6)
+        data = {"id": str(snowflake(0, 4)), "name": name, "type": 1,
+                "options": []}
+        resolved_users = {}
+        for option, value in (options or {}).items():
+            if isinstance(value, dict):
+                resolved_users[value["id"]] = value
+                data["options"].append(
+                    {"name": option, "type": 6, "value": value["id"]})
+            else:
+                data["options"].append({
+                    "name": option,
+                    "type": 4 if isinstance(value, int) else 3,
+                    "value": value
+                })
+        if resolved_users:
+            data["resolved"] = {
+                "users": resolved_users,
+                "members": {
+                    user_id: {key: value for key, value in
+                              member_payload(user, EVERYONE_PERMISSIONS).items()
+                              if key != "user"}
+                    for user_id, user in resolved_users.items()
+                },
+            }
+        return interaction_id, {
+            "id": str(interaction_id),
+            "application_id": str(APPLICATION_ID),
+            "type": 2,
+            "token": f"token-{interaction_id}",
+            "version": 1,
+            "guild_id": str(guild.id),
+            "channel_id": str(guild.channel_id),
+            "channel": guild.channel(),
+            "member": member_payload(user, permissions),
+            "app_permissions": ADMIN_PERMISSIONS,
+            "locale": "en-US",
+            "guild_locale": "en-US",
+            "entitlements": [],
+            "attachment_size_limit": 10 * 2**20,
+            "authorizing_integration_owners": {"0": str(guild.id)},
+            "context": 0,
+            "data": data,
+        }
+
+    async def send_interaction(self, guild, name, options=None, user=None):
+        ws = self.sockets[guild.shard_id(self.shard_count)]
+        interaction_id, payload = self.interaction(guild, name, options, user)
+        self.responded.clear()
+        self.pending[interaction_id] = time.monotonic()
+        await ws.send_json({"op": 0, "t": "INTERACTION_CREATE", "s": None,
+                            "d": payload})
+        return interaction_id
@@ -0,0 +1,148 @@
+"""Load test Villager offline against benchmarks/fake_discord.py.
+
+    python -m benchmarks.load_test --guilds 1000 --members 20 \\
+        --interactions 5000 --rate 1000 --command coinflip
+
+Boots the real bot from main.py against the fake gateway, waits for it
+to be ready, fires interactions at the given rate and reports how fast
+they were answered and which REST calls the bot made along the way.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_discord import FakeDiscord
+
+# Options for the commands that need them, keyed by command name. User
+# options are filled with a random member of the target guild.
+COMMAND_OPTIONS = {
+    "8ball": {"question": "Will it rain?"},
+    "choice": {"choice1": "wheat", "choice2": "carrots"},
+    "fight": {"user": "member", "attack": "sword"},
+    "checkwarns": {"user": "member"},
+    "warn": {"user": "member", "reason": "griefing"},
+    "report": {"issue": "The iron golem is stuck"},
+}
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def configure_environment(server, shard_count, workdir):
+    os.environ.update({
+        "DISCORD_BOT_TOKEN": "fake-token",
+        "DISCORD_API_BASE": server.api_base,
+        "DISCORD_GATEWAY_URL": server.gateway_url,
+        "SHARD_COUNT": str(shard_count),
+        "METRICS_PORT": "0",
+        "WARN_DB_PATH": os.path.join(workdir, "warns.db"),
+        "COMMAND_MANIFEST_PATH": os.path.join(workdir, "manifest.json"),
+        "ESCALATION_POLICY_PATH": os.path.join(workdir, "escalation.json"),
+    })
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def build_options(command, guild):
+    options = {}
+    for name, value in COMMAND_OPTIONS.get(command, {}).items():
+        options[name] = random.choice(guild.members) if value == "member" else value
+    return options
+
+
+async def fire(server, command, count, rate):
+    """Send `count` interactions spread evenly over count / rate seconds."""
+    tick = 0.01
+    per_tick = max(1, int(rate * tick))
+    started = time.monotonic()
+    sent = 0
+    while sent < count:
+        for _ in range(min(per_tick, count - sent)):
+            guild = random.choice(server.guilds)
+            await server.send_interaction(guild, command,
+                                          build_options(command, guild))
+            sent += 1
+        delay = started + sent / rate - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    return time.monotonic() - started
+
+
+async def run(args):
+    server = FakeDiscord(args.guilds, args.members, args.shards)
+    await server.start()
+    workdir = tempfile.mkdtemp(prefix="villager-load-")
+    configure_environment(server, args.shards, workdir)
+
+    import_started = time.monotonic()
+    import main
+    imported = time.monotonic() - import_started
+
+    bot = main.bot
+    boot_started = time.monotonic()
+    runner = asyncio.create_task(bot.start(main.TOKEN))
+    try:
+        waiter = asyncio.create_task(bot.wait_until_ready())
+        await asyncio.wait((waiter, runner), timeout=args.timeout,
+                           return_when=asyncio.FIRST_COMPLETED)
+        if runner.done():
+            runner.result()
+            raise RuntimeError("Bot stopped before it was ready")
+        if not waiter.done():
+            waiter.cancel()
+            raise TimeoutError(f"Bot not ready after {args.timeout:.0f} s")
+        ready = time.monotonic() - boot_started
+        boot_calls = len(server.calls)
+
+        elapsed = await fire(server, args.command, args.interactions,
+                             args.rate)
+        try:
+            await asyncio.wait_for(server.responded.wait(), args.timeout)
+        except asyncio.TimeoutError:
+            pass
+        drained = time.monotonic() - boot_started - ready
+    finally:
+        await bot.close()
+        await asyncio.gather(runner, return_exceptions=True)
+        await server.stop()
+        if runner.done() and not runner.cancelled() and runner.exception():
+            raise runner.exception()
+
+    answered = len(server.latencies)
+    print(f"import main:    {imported * 1000:8.1f} ms")
+    print(f"login to ready: {ready * 1000:8.1f} ms "
+          f"({len(bot.guilds)} guild(s), {args.shards} shard(s), "
+          f"{boot_calls} REST call(s))")
+    print(f"/{args.command}: {answered}/{args.interactions} answered, "
+          f"sent in {elapsed:.2f} s, {answered / drained:.0f} per second")
+    print("latency:        " + "  ".join(
+        f"p{int(q * 100)} {percentile(server.latencies, q) * 1000:.1f} ms"
+        for q in (0.5, 0.95, 0.99)))
+    print("REST calls:")
+    for route, count in server.call_counts().most_common():
+        print(f"  {count:>7}  {route}")
+    return 0 if answered == args.interactions else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--guilds", type=int, default=100)
+    parser.add_argument("--members", type=int, default=20)
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument("--command", default="coinflip")
+    parser.add_argument("--interactions", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=500,
+                        help="interactions per second")
+    parser.add_argument("--timeout", type=float, default=60)
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
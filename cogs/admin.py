@@ -0,0 +1,351 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import timedelta
+
+import discord
+from discord.ext import commands
+
+from utils.command_manifest import command_hashes, guild_scoped
+from utils.escalation import format_duration
+
+log = logging.getLogger("villager.sync")
+
+SYNC_CONCURRENCY = int(os.getenv("SYNC_CONCURRENCY", "4"))
+IPC_TIMEOUT = float(os.getenv("IPC_TIMEOUT", "10"))
+
+
+def describe_changes(changes):
+    parts = ([f"+{name}" for name in changes["added"]] +
+             [f"-{name}" for name in changes["removed"]] +
+             [f"~{name}" for name in changes["changed"]])
+    return ", ".join(parts) if parts else "no changes"
+
+
+class Admin(commands.Cog):
+    """Owner-only maintenance commands."""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        if self.bot.ipc:
+            self.bot.ipc.on("sync", self.handle_cluster_sync)
+            self.bot.ipc.on("reload", self.handle_cluster_reload)
+            self.bot.ipc.on("policy", self.handle_cluster_policy)
+
+    async def sync_target(self, guild_id, dry_run, semaphore, copy_global=True):
+        target = guild_id or "global"
+        guild = discord.Object(id=guild_id) if guild_id else None
+        copy_global = guild is not None and copy_global
+        hashes = command_hashes(self.bot.tree, guild)
+        if copy_global:
+            # Same set copy_global_to() would produce, without touching the tree
+            hashes.update(command_hashes(self.bot.tree))
+        changes = self.bot.command_manifest.diff(target, hashes)
+        if dry_run:
+            return target, changes, 0.0
+        async with semaphore:
+            # Timed once a slot is free, so queued guilds don't report the
+            # wait as sync time
+            started = time.perf_counter()
+            if copy_global:
+                self.bot.tree.copy_global_to(guild=guild)
+            await self.bot.tree.sync(guild=guild)
+            elapsed = time.perf_counter() - started
+        self.bot.command_manifest.record(target, hashes)
+        return target, changes, elapsed
+
+    async def run_sync(self, mode, guild_ids):
+        """Sync this process's targets for `mode` and describe the results."""
+        dry_run = mode == "diff"
+        if mode == "all":
+            # Global commands once, from cluster 0, plus the guilds this
+            # process holds guild-scoped commands for. Global commands are
+            # not copied into every guild, they'd show up twice there.
+            targets = guild_scoped(self.bot.tree)
+            if self.bot.cluster_id == 0:
+                targets.insert(0, None)
+            if not targets:
+                return [f"✅ cluster {self.bot.cluster_id}: no guild-scoped commands"]
+        else:
+            targets = guild_ids if mode != "global" and guild_ids else (None, )
+        copy_global = mode != "all"
+        semaphore = asyncio.Semaphore(SYNC_CONCURRENCY)
+        results = await asyncio.gather(
+            *(self.sync_target(guild_id, dry_run, semaphore, copy_global)
+              for guild_id in targets),
+            return_exceptions=True)
+
+        prefix = f"cluster {self.bot.cluster_id}: " if mode == "all" else ""
+        lines = []
+        for guild_id, result in zip(targets, results):
+            if isinstance(result, Exception):
+                log.error("Failed to sync commands for %s: %s",
+                          guild_id or "global", result)
+                lines.append(f"❌ {prefix}{guild_id or 'global'}: {result}")
+                continue
+            target, changes, elapsed = result
+            if dry_run:
+                lines.append(f"🔍 {target}: {describe_changes(changes)}")
+            else:
+                lines.append(
+                    f"✅ {prefix}{target}: {elapsed * 1000:.0f} ms, {describe_changes(changes)}")
+        return lines
+
+    async def handle_cluster_sync(self, data):
+        return await self.run_sync("all", ())
+
+    async def run_reload(self, names):
+        """Reload this process's extensions and describe the results.
+
+        With no names, only extensions whose source changed on disk are
+        reloaded. Bot state (gateway session, caches, warn store) lives on
+        the bot and in utils/, which are never reloaded, so it carries over.
+        Global commands are only re-synced when the reloaded tree no longer
+        matches the command manifest. Guild copies made by !sync guild are
+        refreshed locally, so those guilds run the new code too, but are
+        not re-synced.
+        """
+        cluster = f"cluster {self.bot.cluster_id}"
+        if not names:
+            targets = self.bot.changed_extensions()
+        elif names == ["all"]:
+            targets = list(self.bot.extension_mtimes)
+        else:
+            targets = [f"cogs.{name}" for name in names]
+        if not targets:
+            return [f"✅ {cluster}: no extension changed on disk"]
+
+        lines = []
+        reloaded = []
+        before = {command.name for command in self.bot.tree.get_commands()}
+        started = time.perf_counter()
+        for name in targets:
+            try:
+                # Rolled back to the old module if the new one fails to load
+                await self.bot.reload_extension(name)
+            except commands.ExtensionError as e:
+                log.error("Failed to reload %s: %s", name, e)
+                lines.append(f"❌ {cluster}: {name}: {e}")
+            else:
+                reloaded.append(name)
+        if not reloaded:
+            return lines
+        lines.insert(0, f"✅ {cluster}: reloaded {', '.join(reloaded)} in "
+                        f"{(time.perf_counter() - started) * 1000:.0f} ms")
+        log.info("Reloaded extension(s): %s", ", ".join(reloaded))
+
+        # Guild commands are looked up first, and copies still point at the
+        # unloaded cog: copy the new commands over them, dropping any that
+        # no longer exist
+        removed = before - {command.name
+                            for command in self.bot.tree.get_commands()}
+        stale = []
+        for guild_id in guild_scoped(self.bot.tree):
+            guild = discord.Object(id=guild_id)
+            for name in removed:
+                self.bot.tree.remove_command(name, guild=guild)
+            self.bot.tree.copy_global_to(guild=guild)
+            if not self.bot.command_manifest.is_current(
+                    guild_id, command_hashes(self.bot.tree, guild)):
+                stale.append(str(guild_id))
+        if stale:
+            lines.append(f"⚠️ {cluster}: guild commands changed in "
+                         f"{', '.join(stale)}, run !sync guilds to push them")
+
+        # Same rule as the startup sync: global commands belong to cluster 0
+        if self.bot.cluster_id != 0:
+            return lines
+        if self.bot.command_manifest.is_current("global",
+                                                command_hashes(self.bot.tree)):
+            lines.append(f"✅ {cluster}: commands unchanged, sync skipped")
+            return lines
+        try:
+            _, changes, elapsed = await self.sync_target(None, False,
+                                                         asyncio.Semaphore(1))
+        except discord.HTTPException as e:
+            log.error("Failed to sync commands after reload: %s", e)
+            lines.append(f"❌ {cluster}: sync failed: {e}")
+        else:
+            lines.append(f"🔄 {cluster}: synced global commands in "
+                         f"{elapsed * 1000:.0f} ms, {describe_changes(changes)}")
+        return lines
+
+    async def handle_cluster_reload(self, data):
+        return await self.run_reload(data)
+
+    async def run_policy_reload(self):
+        """Reload this process's escalation policy and describe the result."""
+        cluster = f"cluster {self.bot.cluster_id}"
+        try:
+            stale = self.bot.reload_escalation()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.error("Failed to reload escalation policy: %s", e)
+            return [f"❌ {cluster}: {e}"]
+        return [f"✅ {cluster}: reloaded, {stale} guild(s) with a new warn "
+                "window will reload their warns"]
+
+    async def handle_cluster_policy(self, data):
+        return await self.run_policy_reload()
+
+    @commands.command()
+    @commands.is_owner()
+    async def sync(self, ctx, mode: str = "global", *guild_ids: int):
+        """Sync app commands.
+
+        !sync                     sync global commands
+        !sync guild <id>          copy global commands to one guild and sync it
+        !sync guilds <id> <id>... same, for several guilds concurrently
+        !sync diff [id]...        show what would change without syncing
+        !sync all                 sync global commands and every cluster's
+                                  guild-scoped commands
+        """
+        mode = mode.lower()
+        if mode not in ("global", "guild", "guilds", "diff", "all"):
+            await ctx.send(f"❌ Unknown sync mode '{mode}'.")
+            return
+        if mode in ("guild", "guilds") and not guild_ids:
+            await ctx.send("❌ Give at least one guild ID to sync.")
+            return
+        if mode == "guild":
+            guild_ids = guild_ids[:1]
+
+        log.info("Manual sync initiated (%s)", mode)
+        sync_msg = await ctx.send("🔄 Manual sync initiated, please wait...")
+        if mode == "all" and self.bot.ipc:
+            # Cluster 0 syncs global commands, every cluster its own
+            # guild-scoped ones
+            local, responses = await asyncio.gather(
+                self.run_sync(mode, guild_ids),
+                self.bot.ipc.request("sync", None, IPC_TIMEOUT * 3))
+            lines = list(local)
+            for response in sorted(responses, key=lambda r: r["src"]):
+                if response["error"]:
+                    lines.append(f"❌ cluster {response['src']}: {response['error']}")
+                else:
+                    lines.extend(response["data"])
+        else:
+            lines = await self.run_sync(mode, guild_ids)
+        report = "\n".join(lines)
+        await sync_msg.edit(content=report[:2000])
+        log.info("Manual sync finished:\n%s", report)
+
+    @commands.command()
+    @commands.is_owner()
+    async def reload(self, ctx, *names: str):
+        """Reload command extensions without reconnecting.
+
+        !reload                   reload extensions changed on disk
+        !reload <name> <name>...  reload these extensions (fun, admin, ...)
+        !reload all               reload every loaded extension
+
+        Runs on every cluster. Guild copies are refreshed in place but not
+        re-synced, follow up with !sync guilds if their definitions changed.
+        """
+        names = [name.lower() for name in names]
+        reload_msg = await ctx.send("🔄 Reloading, please wait...")
+        if self.bot.ipc:
+            local, responses = await asyncio.gather(
+                self.run_reload(names),
+                self.bot.ipc.request("reload", names, IPC_TIMEOUT * 3))
+            lines = list(local)
+            for response in sorted(responses, key=lambda r: r["src"]):
+                if response["error"]:
+                    lines.append(f"❌ cluster {response['src']}: {response['error']}")
+                else:
+                    lines.extend(response["data"])
+        else:
+            lines = await self.run_reload(names)
+        report = "\n".join(lines)
+        await reload_msg.edit(content=report[:2000])
+
+    @commands.command()
+    @commands.is_owner()
+    async def cluster(self, ctx):
+        """Show guild, member and latency totals across every cluster."""
+        clusters = [await self.bot.cluster_stats()]
+        if self.bot.ipc:
+            for response in await self.bot.ipc.request("stats", None, IPC_TIMEOUT):
+                if response["data"]:
+                    clusters.append(response["data"])
+        clusters.sort(key=lambda stats: stats["cluster_id"])
+        lines = [f"{'cluster':<8}{'shards':>8}{'guilds':>9}{'members':>11}{'ping':>8}{'lag':>7}"]
+        for stats in clusters:
+            shards = (f"{stats['shards'][0]}-{stats['shards'][-1]}"
+                      if stats["shards"] else "-")
+            lines.append(
+                f"{stats['cluster_id']:<8}{shards:>8}{stats['guilds']:>9}"
+                f"{stats['members']:>11}{stats['latency_ms']:>6.0f}ms"
+                f"{stats['loop_lag_ms']:>5.0f}ms")
+        lines.append(
+            f"{'total':<8}{sum(len(stats['shards']) for stats in clusters):>8}"
+            f"{sum(stats['guilds'] for stats in clusters):>9}"
+            f"{sum(stats['members'] for stats in clusters):>11}")
+        report = "\n".join(lines)
+        await ctx.send(f"🛰️ {len(clusters)} cluster(s) reporting:\n```\n{report[:1900]}\n```")
+
+    @commands.command()
+    @commands.is_owner()
+    async def reports(self, ctx):
+        stats = self.bot.reports.stats
+        await ctx.send(
+            f"📬 Reports: {stats['queued']}/{stats['capacity']} queued, "
+            f"{stats['submitted']} submitted, {stats['duplicates']} duplicate(s), "
+            f"{stats['dropped']} dropped, {stats['delivered']} delivered in "
+            f"{stats['batches']} digest(s), {stats['failed']} failed.")
+
+    @commands.command()
+    @commands.is_owner()
+    async def metrics(self, ctx):
+        commands_metrics = self.bot.tree.metrics.commands
+        if not commands_metrics:
+            await ctx.send("📊 No app commands have run yet.")
+            return
+        lines = [f"{'command':<16}{'calls':>7}{'p50':>8}{'p95':>8}{'ttfr':>8}{'rest':>6}{'err':>5}"]
+        for name, stats in sorted(commands_metrics.items(),
+                                  key=lambda item: item[1].total.count,
+                                  reverse=True):
+            calls = stats.total.count
+            lines.append(
+                f"{name:<16}{calls:>7}"
+                f"{stats.total.percentile(0.5) * 1000:>6.0f}ms"
+                f"{stats.total.percentile(0.95) * 1000:>6.0f}ms"
+                f"{stats.first_response.percentile(0.5) * 1000:>6.0f}ms"
+                f"{stats.rest_calls / calls:>6.1f}{stats.errors:>5}")
+        report = "\n".join(lines)
+        await ctx.send(f"📊 Command latency (bucket upper bounds):\n```\n{report[:1900]}\n```")
+
+    @commands.command()
+    @commands.is_owner()
+    async def policy(self, ctx, action: str = "show"):
+        if action == "reload":
+            # Every cluster escalates its own guilds, so every one reloads
+            if self.bot.ipc:
+                local, responses = await asyncio.gather(
+                    self.run_policy_reload(),
+                    self.bot.ipc.request("policy", None, IPC_TIMEOUT))
+                lines = list(local)
+                for response in sorted(responses, key=lambda r: r["src"]):
+                    if response["error"]:
+                        lines.append(f"❌ cluster {response['src']}: {response['error']}")
+                    else:
+                        lines.extend(response["data"])
+            else:
+                lines = await self.run_policy_reload()
+            report = "\n".join(lines)
+            await ctx.send(f"⚖️ Escalation policy reload:\n{report}"[:2000])
+            return
+
+        default = self.bot.escalation.default
+        steps = ", ".join(
+            f"{warnings}: {step.action}" +
+            (f" {format_duration(step.duration)}" if step.duration else "")
+            for warnings, step in enumerate(default.table) if step)
+        await ctx.send(
+            f"⚖️ Default policy ({format_duration(timedelta(seconds=default.window))} window): {steps}")
+
+
+async def setup(bot):
+    await bot.add_cog(Admin(bot))
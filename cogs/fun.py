@@ -0,0 +1,119 @@
+import random
+
+import discord
+from discord import app_commands, Member
+from discord.ext import commands
+
+
+class Fun(commands.Cog):
+    """Commands that are just for fun."""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="hello", description="Say hello to the villager!")
+    async def hello(self, interaction: discord.Interaction):
+        await interaction.response.send_message(
+            f"Hrmmm! Hello {interaction.user.mention}!")
+
+    @app_commands.command(name="speak", description="Make the bot say anything")
+    @app_commands.describe(
+        message="The message the bot will say.",
+        channel="(Optional) The channel to send the message in.")
+    async def speak(self, interaction: discord.Interaction,
+                    message: str,
+                    channel: discord.TextChannel = None):
+        # Check if user has permissions or is the bot owner
+        is_authorized = (interaction.user.guild_permissions.kick_members
+                         or await self.bot.is_owner(interaction.user))
+
+        if not is_authorized:
+            await interaction.response.send_message(
+                f"Nice try, {interaction.user.mention}, but you don't have permission to use this command.",
+                ephemeral=True)
+            return
+
+        if channel:
+            await interaction.response.defer(ephemeral=True)
+            await channel.send(message)
+            await interaction.followup.send(f"✅ Sent message ({message}) in {channel.mention}",
+                                            ephemeral=True)
+        else:
+            await interaction.response.send_message(f"✅ Sent message ({message})",
+                                                    ephemeral=True)
+            await interaction.channel.send(message)
+
+    @app_commands.command(
+        name="fight",
+        description="Fight people using ANY custom move (just for fun)",
+        )
+    @app_commands.describe(user="The user you want to attack",
+                           attack="The attack you want to do")
+    async def fight(self, interaction: discord.Interaction, user: Member, attack: str):
+        if user == interaction.client.user:
+            await interaction.response.send_message("😡 Hrmm! *punches you*")
+        else:
+            await interaction.response.send_message(
+                f"{user.mention}! {interaction.user.mention} has done '{attack}' to you!"
+            )
+
+    @app_commands.command(name="coinflip", description="Flip a coin")
+    async def coinflip(self, interaction: discord.Interaction):
+        await interaction.response.send_message(
+            f"The coin landed on {random.choice(['heads', 'tails'])}.")
+
+    @app_commands.command(name="8ball", description="Ask the 8ball a question")
+    @app_commands.describe(question="The question you want to ask the 8ball")
+    async def eightball(self, interaction: discord.Interaction, question: str):
+        responses = [
+            "It is certain.", "It is decidedly so.", "Without a doubt.",
+            "Yes - definitely.", "You may rely on it.", "As I see it, yes.",
+            "Most likely.", "Outlook good.", "Yes.", "Signs point to yes.",
+            "Reply hazy, try again.", "Ask again later.",
+            "Better not tell you now.", "Cannot predict now.",
+            "Concentrate and ask again.", "Don't count on it.", "My reply is no.",
+            "My sources say no.", "Outlook not so good.", "Very doubtful.", "Absolutely not, you idiot.",
+            "Obviously.", "I don't want to answer this question.", "No.", "h̵̡̨̛̺̲͍̞͇̳̹̪̽̐̃̇̀́̽̋̀͐̈͌̋̚̕͜͜͝͝a̷̹̺̪͎̬͉̟̹͖̦͚̖̓̏̕ͅh̵̡̳̗̲̲͍̺̙͎͈͚̱͈̽̐͒̀̈́͑̊̕̕̚ͅä̷̢̧̛̛̻̺̫̻̭̙͔͇̯̖̮̩̱̻̲͈̎̋̍͛͊̈̈̀́̋͗̌̒͘ḩ̴̞̞͓̘̖̱͚̼̣͍̤̯̻̣͖̭͈̊̌͑̉̆͗̾͒ą̵̦̹̬̼̘̭͕͈͍̠̹̰̪̻̳̮͚̓̋̽̚̚h̵̯̰̤̤̝̜͔̥̝̙̳̰͈̭̤̗̹̓͊̒̆̒ͅͅa̸̟̮̒̀̀̃̈́̿͑͆͠ẖ̸̠̝̣̋̇́̂̋͗̈́͋̒͆̕͜ͅͅḁ̴̭̗̗͖̩̳͚͎̈́̑͛̉̾̀͒͊̃̒́̏̒͐͂̓͜h̵̹̠̝̽ä̸̢̡̨̡̛͈̹̝͈̭̺̤͇̳̹̼̦̝́̇̒̋̓̀͌̈́̿͂͒̊̾̑͆͘͟͝ḩ̷̞͖̿̽͘a̷̦͉̦̼̞̱͗̆́̈̓̈̿̀̕͘͠h̶̨̨̡̨̛̝̞̭̣̖̗͖͕̰̠̻͍̝͚͗̄̄͐̏̌̌͆̅̀̓̉̈́̕a̸̡̙̲̥̙̪̖̲̘̣͍͖̬̱̐́̂̐͑̀̈́͒͌̓͂̍̄̚̕͝h̷̰̯͉̻̝͓̥̙̞̆͌̔̾̐̐͆́͂̒̀ą̷͍͎̮͙͈̥̬̜͉̫͋͛̒̈́̆̾̂̚͠ḧ̵̡̢̨͈͇͍̹̣͚̮͕̫̮́̎̊̈́͊͒́̈́͛͛̆͐͊̉̑̚͠͝͠ā̷̢͈̯̮͇̫̯͉̯̤̼͔̼̲̞̰̍́͐̄̐̆̐͑̍͆̅͋͊̀͑̕̕h̴͉̜̤̞͔̗͛̑̄́̾͆͋͒̿̎̈́ȁ̴̦͍͉͙͈̬͕̯̼̻̙̱̬̰̎̀̉̂̄̓̓h̸̡̫͍̳̘̠̖̥̞̜̯̠̲͌́̂̇͝ḁ̷͉͊̌̇̏̑̇̾̂̓̔̄̂͂̋̚̕"
+        ]
+        embed = discord.Embed(title="🎱 8ball 🎱", color=discord.Color.blue())
+        embed.add_field(name="Question",
+                        value=f"{interaction.user.mention} asked: '{question}'",
+                        inline=False)
+        embed.add_field(name="Answer",
+                        value=f"The 8ball says: '{random.choice(responses)}'",
+                        inline=False)
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="choice", description="Make the bot pick one out of a list of choices! (Max 5)")
+    @app_commands.describe(choice1="Choice 1",
+                           choice2="Choice 2",
+                           choice3="Choice 3",
+                           choice4="Choice 4",
+                           choice5="Choice 5")
+    async def choice(self, interaction: discord.Interaction,
+                     choice1:str,
+                     choice2:str,
+                     choice3:str=None,
+                     choice4:str=None,
+                     choice5:str=None):
+        choices = [choice1, choice2, choice3, choice4, choice5]
+        await interaction.response.send_message(f"The bot has picked: {random.choice(choices)}")
+
+    @app_commands.command(name="slap",
+                          description="Slap someone!",
+                          )
+    @app_commands.describe(user="The user who you want to slap.")
+    @app_commands.choices(tool=[
+        app_commands.Choice(name="Hand", value="Hand"),
+        app_commands.Choice(name="Fish", value="Fish"),
+        app_commands.Choice(name="Sock", value="Sock")])
+    async def slap(self, interaction: discord.Interaction, user: Member, tool: app_commands.Choice[str]):
+        if tool.value == "Hand":
+            message = f"{user.mention}! {interaction.user.mention} slapped you! Are you going to retaliate?"
+        elif tool.value in ["Fish", "Sock"]:
+            message = f"{user.mention}! {interaction.user.mention} slapped you with a {tool.value}! Will you retaliate?"
+        await interaction.response.send_message(message)
+
+
+async def setup(bot):
+    await bot.add_cog(Fun(bot))
@@ -0,0 +1,479 @@
+import asyncio
+import csv
+import io
+import os
+import re
+import time
+from datetime import datetime, timedelta
+
+import discord
+from discord import app_commands, Member
+from discord.ext import commands
+
+# Bulk moderation limits
+BULK_MAX_TARGETS = int(os.getenv("BULK_MAX_TARGETS", "1000"))
+BULK_PROGRESS_INTERVAL = 2.0
+USER_ID_PATTERN = re.compile(r"\d{15,20}")
+ESCALATION_VERBS = {"timeout": "timed out", "kick": "kicked", "ban": "banned"}
+# Listing and export limits
+LIST_MAX_USERS = 25
+EXPORT_MAX_ROWS = int(os.getenv("EXPORT_MAX_ROWS", "100000"))
+EXPORT_MAX_FILES = 10
+
+
+def export_csv(rows, max_bytes, max_files):
+    """Render warn rows as up to `max_files` CSV files of `max_bytes` each.
+
+    Every file repeats the header so each one opens on its own. Returns the
+    files and how many rows made it in before the files ran out.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def encode(row):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        return buffer.getvalue().encode()
+
+    header = encode(["user_id", "issued_at", "reason"])
+    files = []
+    lines, size = [header], len(header)
+    written = 0
+    for user_id, issued_at, reason in rows:
+        line = encode([
+            user_id,
+            datetime.fromtimestamp(issued_at).isoformat(timespec="seconds"),
+            reason or ""
+        ])
+        if size + len(line) > max_bytes and len(lines) > 1:
+            files.append(b"".join(lines))
+            lines, size = [header], len(header)
+            if len(files) == max_files:
+                return files, written
+        lines.append(line)
+        size += len(line)
+        written += 1
+    files.append(b"".join(lines))
+    return files, written
+
+
+class Moderation(commands.Cog):
+    """Warnings, escalation and bulk moderation."""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        await self.bot.start_warnings()
+
+    bulk = app_commands.Group(name="bulk",
+                              description="Moderate many users at once")
+
+    @app_commands.command(name="warn", description="Warn a user")
+    @app_commands.describe(user="The user you want to warn",
+                           reason="The reason for the warn")
+    async def warn(self, interaction: discord.Interaction,
+                   user: Member,
+                   reason: str = None):
+
+        # Check if user has permissions or is the bot owner
+        is_authorized = (interaction.user.guild_permissions.kick_members
+                         or await self.bot.is_owner(interaction.user))
+
+        if not is_authorized:
+            await interaction.response.send_message(
+                f"Nice try, {interaction.user.mention}, but you don't have permission to use this command.",
+                ephemeral=True)
+            return
+
+        guild_id = interaction.guild.id
+        now = datetime.now().timestamp()
+        warnings = len(await self.bot.warns.add(guild_id, user.id, now, reason))
+
+        await interaction.response.send_message(
+            f"⚠️ {user.mention} has been warned. Reason: {reason}. They now have {warnings} warn(s). ⚠️"
+        )
+
+        channel = self.bot.get_channel(1358592562620796981)
+        if channel:
+            self.bot.actions.submit(self.bot.escalation_actions(user, warnings, channel))
+
+    @app_commands.command(name="removewarns",
+                          description="Remove a warning from a user.")
+    @app_commands.describe(user="The user whose warn you want to remove",
+                           amount="The number of warns to remove")
+    async def removewarns(self, interaction: discord.Interaction, user: Member,
+                          amount: int):
+        await interaction.response.defer(ephemeral=True)
+
+        if not interaction.user.guild_permissions.kick_members:
+            await interaction.followup.send(
+                f"Nice try, {interaction.user.mention}, but you don't have permission to use this command.",
+                ephemeral=True)
+            return
+
+        guild_id = interaction.guild.id
+        now = datetime.now().timestamp()
+        warnings = len(await self.bot.warns.active(guild_id, user.id, now))
+
+        if warnings == 0:
+            await interaction.followup.send(
+                f"{user.mention} doesn't have any warns to remove.",
+                ephemeral=True)
+            return
+
+        if amount <= 0:
+            await interaction.followup.send(
+                "You must specify a positive number to remove.", ephemeral=True)
+            return
+
+        if warnings < amount:
+            await interaction.followup.send(
+                f"{user.mention} only has {warnings} warns, can't remove {amount}.",
+                ephemeral=True)
+            return
+
+        await self.bot.warns.remove_latest(guild_id, user.id, amount, now)
+
+        await interaction.followup.send(
+            f"✅ {amount} warns have been removed from {user.mention}. They now have {warnings - amount} warns.",
+            ephemeral=True)
+
+    @app_commands.command(name="checkwarns",
+                          description="Check how many warnings a user has.")
+    @app_commands.describe(user="The user whose warnings you want to check")
+    async def checkwarns(self, interaction: discord.Interaction, user: Member):
+        # Check if user has permissions or is the bot owner
+        is_authorized = (interaction.user.guild_permissions.kick_members
+                         or await self.bot.is_owner(interaction.user))
+
+        if not is_authorized:
+            await interaction.response.send_message(
+                f"Nice try, {interaction.user.mention}, but you don't have permission to use this command.",
+                ephemeral=True)
+            return
+
+        warnings = len(await self.bot.warns.active(interaction.guild.id, user.id,
+                                                   datetime.now().timestamp()))
+        if warnings == 0:
+            await interaction.response.send_message(
+                f"{user.mention} has no warnings.", ephemeral=True)
+            return
+
+        await interaction.response.send_message(
+            f"{user.mention} has {warnings} warning(s).", ephemeral=True)
+
+    @app_commands.command(name="listwarns",
+                          description="List everyone with active warnings in this server.")
+    async def listwarns(self, interaction: discord.Interaction):
+        is_authorized = (interaction.user.guild_permissions.kick_members
+                         or await self.bot.is_owner(interaction.user))
+
+        if not is_authorized:
+            await interaction.response.send_message(
+                f"Nice try, {interaction.user.mention}, but you don't have permission to use this command.",
+                ephemeral=True)
+            return
+
+        guild_id = interaction.guild.id
+        rows, total = await self.bot.warn_store.summary(
+            guild_id, self.bot.warns.cutoff(guild_id, datetime.now().timestamp()),
+            LIST_MAX_USERS)
+        if not rows:
+            await interaction.response.send_message(
+                "Nobody in this server has any warnings.", ephemeral=True)
+            return
+
+        lines = [f"<@{user_id}>: {warnings} warning(s)"
+                 for user_id, warnings in rows]
+        if total > len(rows):
+            lines.append(f"...and {total - len(rows)} more.")
+        embed = discord.Embed(title=f"Active warnings in {interaction.guild.name}",
+                              description="\n".join(lines),
+                              color=discord.Color.orange())
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="clearwarns",
+                          description="Clear active warnings for a user or the whole server.")
+    @app_commands.describe(
+        user="(Optional) The user whose warnings you want to clear. Leave empty to clear everyone.")
+    async def clearwarns(self, interaction: discord.Interaction, user: Member = None):
+        permissions = interaction.user.guild_permissions
+        is_authorized = ((permissions.kick_members if user else permissions.administrator)
+                         or await self.bot.is_owner(interaction.user))
+
+        if not is_authorized:
+            await interaction.response.send_message(
+                f"Nice try, {interaction.user.mention}, but you don't have permission to use this command.",
+                ephemeral=True)
+            return
+
+        guild_id = interaction.guild.id
+        user_id = user.id if user else None
+        cleared = await self.bot.warn_store.clear(
+            guild_id, self.bot.warns.cutoff(guild_id, datetime.now().timestamp()), user_id)
+        self.bot.warn_cache.clear(guild_id, user_id)
+
+        target = user.mention if user else "this server"
+        await interaction.response.send_message(
+            f"✅ Cleared {cleared} warning(s) for {target}.", ephemeral=True)
+
+    @app_commands.command(name="exportwarns",
+                          description="Export this server's warning history as a CSV file.")
+    async def exportwarns(self, interaction: discord.Interaction):
+        is_authorized = (interaction.user.guild_permissions.kick_members
+                         or await self.bot.is_owner(interaction.user))
+
+        if not is_authorized:
+            await interaction.response.send_message(
+                f"Nice try, {interaction.user.mention}, but you don't have permission to use this command.",
+                ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        guild = interaction.guild
+        rows, total = await self.bot.warn_store.export(guild.id,
+                                                       EXPORT_MAX_ROWS)
+        # Formatting a big export would stall the gateway
+        files, exported = await asyncio.to_thread(
+            export_csv, rows, guild.filesize_limit, EXPORT_MAX_FILES)
+
+        message = f"📄 Exported {exported} warning(s)."
+        if exported < total:
+            message += (f" This server has {total}, so only the first "
+                        f"{exported} (ordered by user) are included.")
+        for part, data in enumerate(files, start=1):
+            name = (f"warns-{guild.id}.csv" if len(files) == 1
+                    else f"warns-{guild.id}-{part}.csv")
+            await interaction.followup.send(
+                message if part == 1 else None,
+                file=discord.File(io.BytesIO(data), filename=name),
+                ephemeral=True)
+
+    async def escalate(self, member, warnings, channel):
+        actions = self.bot.escalation_actions(member, warnings, channel,
+                                              notify=False)
+        return actions, await self.bot.actions.gather(actions)
+
+    async def resolve_targets(self, interaction, role, joined_within, user_ids):
+        """Members matching every given filter, and how many IDs weren't found.
+
+        A pasted ID list picks the candidates, otherwise the whole server is
+        considered; the role and join window then narrow that down.
+        """
+        guild = interaction.guild
+        if (role or joined_within or not user_ids) and not guild.chunked:
+            await guild.chunk()
+
+        missing = 0
+        if user_ids:
+            ids = {int(match) for match in USER_ID_PATTERN.findall(user_ids)}
+            members = {}
+            unresolved = []
+            for user_id in ids:
+                member = guild.get_member(user_id)
+                if member:
+                    members[user_id] = member
+                else:
+                    unresolved.append(user_id)
+            for i in range(0, len(unresolved), 100):
+                for member in await guild.query_members(
+                        user_ids=unresolved[i:i + 100], limit=100):
+                    members[member.id] = member
+            missing = len(ids) - len(members)
+            candidates = members.values()
+        else:
+            candidates = guild.members
+
+        since = (discord.utils.utcnow() - timedelta(minutes=joined_within)
+                 if joined_within else None)
+        targets = [
+            member for member in candidates
+            if (role is None or role in member.roles) and (
+                since is None or (member.joined_at and member.joined_at >= since))
+            and member.id not in (interaction.user.id, self.bot.user.id)
+        ]
+        return targets, missing
+
+    async def bulk_targets_or_error(self, interaction, role, joined_within, user_ids):
+        if not (role or joined_within or user_ids):
+            await interaction.followup.send(
+                "Pick at least one of role, joined_within or user_ids.")
+            return None
+        if not self.bot.intents.members:
+            await interaction.followup.send(
+                "Bulk moderation needs the members intent, switch CACHE_PROFILE to 'moderation' or 'full'.")
+            return None
+        targets, missing = await self.resolve_targets(interaction, role, joined_within,
+                                                      user_ids)
+        if not targets:
+            await interaction.followup.send("No members matched those filters.")
+            return None
+        if len(targets) > BULK_MAX_TARGETS:
+            await interaction.followup.send(
+                f"{len(targets)} members matched, the limit is {BULK_MAX_TARGETS}. Narrow the filters down.")
+            return None
+        return targets, missing
+
+    @bulk.command(name="warn", description="Warn every member matching the filters")
+    @app_commands.describe(
+        reason="The reason for the warn",
+        role="(Optional) Only members with this role",
+        joined_within="(Optional) Only members who joined in the last N minutes",
+        user_ids="(Optional) User IDs or mentions, separated by spaces")
+    async def bulk_warn(self, interaction: discord.Interaction,
+                        reason: str = None,
+                        role: discord.Role = None,
+                        joined_within: app_commands.Range[int, 1] = None,
+                        user_ids: str = None):
+        is_authorized = (interaction.user.guild_permissions.kick_members
+                         or await self.bot.is_owner(interaction.user))
+
+        if not is_authorized:
+            await interaction.response.send_message(
+                f"Nice try, {interaction.user.mention}, but you don't have permission to use this command.",
+                ephemeral=True)
+            return
+
+        await interaction.response.defer()
+        resolved = await self.bulk_targets_or_error(interaction, role, joined_within,
+                                                    user_ids)
+        if resolved is None:
+            return
+        targets, missing = resolved
+
+        guild_id = interaction.guild.id
+        now = datetime.now().timestamp()
+        warns = await self.bot.warns.add_many(guild_id, [m.id for m in targets],
+                                              now, reason)
+
+        total = len(targets)
+        progress = await interaction.followup.send(
+            f"⚠️ Warned {total} user(s). Reason: {reason}. Escalating: 0/{total}",
+            wait=True)
+
+        channel = self.bot.get_channel(1358592562620796981)
+        # No per-member notices: a thousand sends to one channel would sit
+        # on its rate limit while holding the shared action slots. The log
+        # channel gets a single summary instead.
+        jobs = [
+            self.escalate(member, len(warns[member.id]), channel)
+            for member in targets
+        ] if channel else []
+
+        done = failed = 0
+        applied = {}
+        last_edit = time.monotonic()
+        for job in asyncio.as_completed(jobs):
+            actions, results = await job
+            for (name, _), result in zip(actions, results):
+                if isinstance(result, Exception):
+                    failed += 1
+                else:
+                    applied[name] = applied.get(name, 0) + 1
+            done += 1
+            if time.monotonic() - last_edit >= BULK_PROGRESS_INTERVAL:
+                last_edit = time.monotonic()
+                await progress.edit(
+                    content=f"⚠️ Warned {total} user(s). Reason: {reason}. Escalating: {done}/{total}")
+
+        if applied:
+            await channel.send(
+                f"⚠️ Bulk warn by {interaction.user.mention}: " + ", ".join(
+                    f"{count} {ESCALATION_VERBS[name]}"
+                    for name, count in sorted(applied.items())) + ".")
+
+        summary = f"⚠️ Warned {total} user(s). Reason: {reason}. ⚠️"
+        if failed:
+            summary += f"\n❌ {failed} escalation action(s) failed."
+        if missing:
+            summary += f"\n{missing} ID(s) weren't found in this server."
+        await progress.edit(content=summary)
+
+    @bulk.command(name="clear",
+                  description="Clear active warnings for every member matching the filters")
+    @app_commands.describe(
+        role="(Optional) Only members with this role",
+        joined_within="(Optional) Only members who joined in the last N minutes",
+        user_ids="(Optional) User IDs or mentions, separated by spaces")
+    async def bulk_clear(self, interaction: discord.Interaction,
+                         role: discord.Role = None,
+                         joined_within: app_commands.Range[int, 1] = None,
+                         user_ids: str = None):
+        # Filters can match the whole server, so this needs the same
+        # permission as clearing everyone with /clearwarns
+        is_authorized = (interaction.user.guild_permissions.administrator
+                         or await self.bot.is_owner(interaction.user))
+
+        if not is_authorized:
+            await interaction.response.send_message(
+                f"Nice try, {interaction.user.mention}, but you don't have permission to use this command.",
+                ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        resolved = await self.bulk_targets_or_error(interaction, role, joined_within,
+                                                    user_ids)
+        if resolved is None:
+            return
+        targets, missing = resolved
+
+        guild_id = interaction.guild.id
+        cleared = await self.bot.warn_store.clear_many(
+            guild_id, [m.id for m in targets],
+            self.bot.warns.cutoff(guild_id, datetime.now().timestamp()))
+        for member in targets:
+            self.bot.warn_cache.clear(guild_id, member.id)
+
+        summary = f"✅ Cleared {cleared} warning(s) from {len(targets)} user(s)."
+        if missing:
+            summary += f"\n{missing} ID(s) weren't found in this server."
+        await interaction.followup.send(summary)
+
+    @bulk.command(name="check",
+                  description="Check warnings for every member matching the filters")
+    @app_commands.describe(
+        role="(Optional) Only members with this role",
+        joined_within="(Optional) Only members who joined in the last N minutes",
+        user_ids="(Optional) User IDs or mentions, separated by spaces")
+    async def bulk_check(self, interaction: discord.Interaction,
+                         role: discord.Role = None,
+                         joined_within: app_commands.Range[int, 1] = None,
+                         user_ids: str = None):
+        is_authorized = (interaction.user.guild_permissions.kick_members
+                         or await self.bot.is_owner(interaction.user))
+
+        if not is_authorized:
+            await interaction.response.send_message(
+                f"Nice try, {interaction.user.mention}, but you don't have permission to use this command.",
+                ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        resolved = await self.bulk_targets_or_error(interaction, role, joined_within,
+                                                    user_ids)
+        if resolved is None:
+            return
+        targets, missing = resolved
+
+        warns = await self.bot.warns.active_many(interaction.guild.id,
+                                                 [m.id for m in targets],
+                                                 datetime.now().timestamp())
+        warned = sorted(((len(warns[m.id]), m) for m in targets if warns[m.id]),
+                        key=lambda item: item[0], reverse=True)
+        lines = [f"{member.mention}: {count} warning(s)"
+                 for count, member in warned[:25]]
+        if len(warned) > 25:
+            lines.append(f"...and {len(warned) - 25} more.")
+        embed = discord.Embed(
+            title=f"{len(warned)} of {len(targets)} user(s) have warnings",
+            description="\n".join(lines) or "Nobody has any warnings.",
+            color=discord.Color.orange())
+        if missing:
+            embed.set_footer(text=f"{missing} ID(s) weren't found in this server.")
+        await interaction.followup.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Moderation(bot))
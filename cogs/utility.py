@@ -0,0 +1,65 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+
+class Utility(commands.Cog):
+    """Server info, latency and bug reports."""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        await self.bot.start_reports()
+
+    @app_commands.command(name="ping", description="Check bot's latency")
+    async def ping(self, interaction: discord.Interaction):
+        p50, p99 = self.bot.loop_monitor.percentiles(0.5, 0.99)
+        shard_id = interaction.guild.shard_id if interaction.guild else 0
+        shard = self.bot.get_shard(shard_id)
+        latency = shard.latency if shard else self.bot.latency
+        message = f"🏓  **Latency:** {round(latency * 1000)} ms  🏓"
+        if self.bot.shard_count and self.bot.shard_count > 1:
+            shards = "  ".join(f"#{sid}: {round(lat * 1000)} ms"
+                               for sid, lat in self.bot.latencies[:25])
+            message += f"\n🧩 Shard {shard_id} of {self.bot.shard_count} | {shards}"
+        message += f"\n⏱️ Event loop lag: p50 {p50 * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms"
+        await interaction.response.send_message(message)
+
+    @app_commands.command(name="serverinfo",
+                          description="Get information about the server",
+                          )
+    async def serverinfo(self, interaction: discord.Interaction):
+        server = interaction.guild
+        embed = discord.Embed(title=f"Info about {server.name}:",
+                              color=discord.Color.green())
+        embed.add_field(name="Server Owner",
+                        value=f"<@{server.owner_id}>",
+                        inline=False)
+        embed.add_field(name="Member Count",
+                        value=server.member_count,
+                        inline=True)
+        embed.add_field(name="Created At",
+                        value=server.created_at.strftime("%B %d, %Y"),
+                        inline=True)
+        embed.set_thumbnail(url=server.icon.url if server.icon else None)
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="report",
+                          description="Report a small issue to the creator/dev(s)",
+                          )
+    @app_commands.describe(issue="The issue you want to report.")
+    async def report(self, interaction: discord.Interaction, issue: str):
+        if not self.bot.reports.submit(str(interaction.user), issue):
+            await interaction.response.send_message(
+                "📭 Too many reports right now, please try again later.",
+                ephemeral=True)
+            return
+        app_info = await self.bot.app_info.get()
+        owner = app_info.owner
+        await interaction.response.send_message(
+            f"✅ Your bug has been reported to {owner.name}.", ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(Utility(bot))
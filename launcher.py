@@ -0,0 +1,170 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import urllib.request
+
+from dotenv import load_dotenv
+
+from utils.ipc import IPCBroker
+from utils.logs import setup_logging
+
+load_dotenv()
+
+log_listener = setup_logging(os.getenv("LOG_LEVEL", "INFO"),
+                             os.getenv("LOG_LEVELS", ""), "",
+                             os.getenv("LOG_FORMAT", "json"))
+log = logging.getLogger("villager.launcher")
+
+TOKEN = os.getenv("DISCORD_BOT_TOKEN")
+if not TOKEN:
+    raise ValueError("DISCORD_BOT_TOKEN environment variable is not set.")
+# Same override the workers use, so a proxy or test server sees every call
+DISCORD_API_BASE = (os.getenv("DISCORD_API_BASE")
+                    or "https://discord.com/api/v10").rstrip("/")
+# Workers run this, wherever the launcher was started from
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "main.py")
+
+CLUSTER_COUNT = int(os.getenv("CLUSTER_COUNT") or os.cpu_count() or 1)
+SHARD_COUNT = int(os.getenv("SHARD_COUNT") or 0) or None
+# Shards allowed to IDENTIFY at once, from Discord unless SHARD_COUNT is
+# set. Large bots get more than 1, see session_start_limit.
+IDENTIFY_CONCURRENCY = int(os.getenv("IDENTIFY_CONCURRENCY") or 0) or None
+METRICS_PORT = int(os.getenv("METRICS_PORT", "8080"))
+# Workers talk to each other through a broker on this Unix socket, by
+# default in a private (0700) directory so other users can't reach it
+IPC_SOCKET_DIR = (None if os.getenv("IPC_SOCKET")
+                  else tempfile.mkdtemp(prefix="villager-"))
+IPC_SOCKET = os.getenv("IPC_SOCKET") or os.path.join(IPC_SOCKET_DIR,
+                                                     "ipc.sock")
+
+# A worker that stays up this long has its restart backoff reset
+STABLE_AFTER = 60.0
+MAX_BACKOFF = 60.0
+
+
+def gateway_info():
+    request = urllib.request.Request(
+        f"{DISCORD_API_BASE}/gateway/bot",
+        headers={"Authorization": f"Bot {TOKEN}",
+                 "User-Agent": "villager-bot launcher"})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        info = json.load(response)
+    return info["shards"], info["session_start_limit"]["max_concurrency"]
+
+
+def shard_ranges(shard_count, cluster_count):
+    """Split shards into `cluster_count` contiguous, near-equal ranges."""
+    cluster_count = min(cluster_count, shard_count)
+    size, extra = divmod(shard_count, cluster_count)
+    ranges = []
+    start = 0
+    for cluster_id in range(cluster_count):
+        end = start + size + (cluster_id < extra)
+        ranges.append(range(start, end))
+        start = end
+    return ranges
+
+
+class Worker:
+    def __init__(self, cluster_id, cluster_count, shard_count, shards):
+        self.cluster_id = cluster_id
+        self.cluster_count = cluster_count
+        self.shard_count = shard_count
+        self.shards = shards
+        self.process = None
+        self.restarts = 0
+
+    def env(self):
+        env = dict(os.environ)
+        env.update({
+            "CLUSTER_ID": str(self.cluster_id),
+            "CLUSTER_COUNT": str(self.cluster_count),
+            "SHARD_COUNT": str(self.shard_count),
+            "SHARD_IDS": f"{self.shards.start}-{self.shards.stop - 1}",
+            "IPC_SOCKET": IPC_SOCKET,
+        })
+        if METRICS_PORT:
+            env["METRICS_PORT"] = str(METRICS_PORT + self.cluster_id)
+        return env
+
+    async def supervise(self, stopping):
+        backoff = 1.0
+        while not stopping.is_set():
+            started = time.monotonic()
+            self.process = await asyncio.create_subprocess_exec(
+                sys.executable, MAIN_SCRIPT, env=self.env())
+            log.info("Started cluster %d (shards %d-%d, pid %d)",
+                     self.cluster_id, self.shards.start, self.shards.stop - 1,
+                     self.process.pid,
+                     extra={"cluster_id": self.cluster_id,
+                            "pid": self.process.pid})
+            code = await self.process.wait()
+            if stopping.is_set():
+                break
+            if time.monotonic() - started >= STABLE_AFTER:
+                backoff = 1.0
+            self.restarts += 1
+            log.warning("Cluster %d exited with code %s, restarting in %.0f s",
+                        self.cluster_id, code, backoff,
+                        extra={"cluster_id": self.cluster_id,
+                               "exit_code": code,
+                               "restarts": self.restarts})
+            try:
+                await asyncio.wait_for(stopping.wait(), backoff)
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, MAX_BACKOFF)
+
+    def terminate(self):
+        if self.process is not None and self.process.returncode is None:
+            self.process.terminate()
+
+
+async def main():
+    if SHARD_COUNT:
+        shard_count, max_concurrency = SHARD_COUNT, 1
+    else:
+        shard_count, max_concurrency = await asyncio.to_thread(gateway_info)
+    max_concurrency = IDENTIFY_CONCURRENCY or max_concurrency
+    ranges = shard_ranges(shard_count, CLUSTER_COUNT)
+    workers = [
+        Worker(cluster_id, len(ranges), shard_count, shards)
+        for cluster_id, shards in enumerate(ranges)
+    ]
+    log.info("Launching %d cluster(s) for %d shard(s)", len(workers),
+             shard_count)
+    # Every worker identifies through the broker, so clusters starting
+    # (or restarting) together don't trip the identify rate limit
+    broker = IPCBroker(IPC_SOCKET, max_concurrency)
+    await broker.start()
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    supervisors = [
+        asyncio.create_task(worker.supervise(stopping)) for worker in workers
+    ]
+    await stopping.wait()
+    log.info("Shutting down %d cluster(s)", len(workers))
+    for worker in workers:
+        worker.terminate()
+    await asyncio.gather(*supervisors)
+    await broker.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    finally:
+        if IPC_SOCKET_DIR:
+            shutil.rmtree(IPC_SOCKET_DIR, ignore_errors=True)
+        log_listener.stop()
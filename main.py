@@ -1,370 +1,495 @@
+import time
+
+# Taken before the imports below so they show up in the startup profile
+PROCESS_STARTED = time.perf_counter()
+
 import os
+import atexit
+import logging
+import csv
+import json
 import discord
 import asyncio
-import random
-from discord.ext import commands
-from discord import app_commands, Member
-from datetime import datetime, timedelta
-from threading import Thread
+import yarl
+from discord.ext import commands, tasks
+from datetime import datetime
 from dotenv import load_dotenv
+from utils.actions import ActionExecutor
+from utils.cache_profile import PROFILES, get_profile
+from utils.escalation import EscalationPolicies, format_duration
+from utils.ipc import IPCClient
+from utils.command_manifest import CommandManifest, command_hashes
+from utils.logs import setup_logging
+from utils.loop_monitor import LoopMonitor
+from utils.metrics import InstrumentedTree, instrument_rest
+from utils.metrics_server import MetricsServer, render_bot_metrics
+from utils.reports import ReportPipeline
+from utils.startup import StartupProfiler
+from utils.ttl_cache import CachedValue
+from utils.warn_cache import WarnCache
+from utils.warn_store import SQLiteWarnStore
+from utils.warns import WarnLedger
 
 load_dotenv()
 
+# Logs go through a queue so emitting one never blocks the event loop
+log_listener = setup_logging(
+    os.getenv("LOG_LEVEL", "INFO"), os.getenv("LOG_LEVELS", ""),
+    os.getenv("LOG_SAMPLE_RATES", "villager.commands=0.1"),
+    os.getenv("LOG_FORMAT", "json"))
+atexit.register(log_listener.stop)
+log = logging.getLogger("villager")
+sync_log = logging.getLogger("villager.sync")
+warn_log = logging.getLogger("villager.warns")
+
+instrument_rest()
+
+startup = StartupProfiler(PROCESS_STARTED)
+startup.mark("imports")
+
 # Get the bot token from environment variables
 TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 if not TOKEN:
     raise ValueError("DISCORD_BOT_TOKEN environment variable is not set.")
 
-# In-memory warning storage
-warns = {}
-
-
-def prune_old_warns(user_id):
-    if user_id in warns:
-        warns[user_id] = [
-            dt for dt in warns[user_id]
-            if datetime.now() - dt < timedelta(days=7)
-        ]
-        if not warns[user_id]:  # Remove empty lists
-            del warns[user_id]
-
-
-class Villager(commands.Bot):
+DEVELOPER_ID = 947551947735576627
+
+# Point the bot at a stand-in for Discord, see benchmarks/fake_discord.py
+DISCORD_API_BASE = os.getenv("DISCORD_API_BASE")
+DISCORD_GATEWAY_URL = os.getenv("DISCORD_GATEWAY_URL")
+if DISCORD_API_BASE:
+    discord.http.Route.BASE = DISCORD_API_BASE
+if DISCORD_GATEWAY_URL:
+    discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(
+        DISCORD_GATEWAY_URL)
+
+# How long application info and the developer's DM channel stay cached
+APP_INFO_TTL = float(os.getenv("APP_INFO_TTL", "3600"))
+
+# Bug reports are batched into digests sent to the developer
+REPORT_QUEUE_SIZE = int(os.getenv("REPORT_QUEUE_SIZE", "500"))
+REPORT_FLUSH_SIZE = int(os.getenv("REPORT_FLUSH_SIZE", "20"))
+REPORT_FLUSH_INTERVAL = float(os.getenv("REPORT_FLUSH_INTERVAL", "30"))
+REPORT_DEDUP_WINDOW = float(os.getenv("REPORT_DEDUP_WINDOW", "3600"))
+
+# Escalation side effects (timeouts, bans) run through a shared executor
+ACTION_CONCURRENCY = int(os.getenv("ACTION_CONCURRENCY", "10"))
+ACTION_RETRIES = int(os.getenv("ACTION_RETRIES", "3"))
+
+# Prometheus metrics include guild IDs, so they're only served locally
+# unless METRICS_HOST says otherwise (0.0.0.0 to expose them on the port
+# Replit already exposes). Set METRICS_PORT to 0 to turn the endpoint off.
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "8080"))
+
+# Event loop lag probe and blocked-loop watchdog
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
+SLOW_CALLBACK_THRESHOLD_MS = float(os.getenv("SLOW_CALLBACK_THRESHOLD_MS", "100"))
+SLOW_CALLBACK_LOG_INTERVAL = float(os.getenv("SLOW_CALLBACK_LOG_INTERVAL", "60"))
+
+
+def parse_shard_ids(spec):
+    """Parse "0-3,8,10-11" into a sorted list of shard IDs."""
+    shard_ids = set()
+    for part in filter(None, (part.strip() for part in spec.split(","))):
+        start, _, end = part.partition("-")
+        shard_ids.update(range(int(start), int(end or start) + 1))
+    return sorted(shard_ids)
+
+
+# Sharding: leave both unset to let Discord pick the shard count. To run
+# only part of the bot, set SHARD_COUNT and the SHARD_IDS ("0-3,8") this
+# process owns.
+SHARD_COUNT = int(os.getenv("SHARD_COUNT") or 0) or None
+SHARD_IDS = parse_shard_ids(os.getenv("SHARD_IDS", "")) or None
+if SHARD_IDS and not SHARD_COUNT:
+    raise ValueError("SHARD_IDS requires SHARD_COUNT to be set.")
+
+# Set by launcher.py when several processes share the shards. Only the
+# first cluster syncs global commands at startup.
+CLUSTER_ID = int(os.getenv("CLUSTER_ID", "0"))
+# Unix socket of the launcher's IPC broker, used for cluster-wide commands
+IPC_SOCKET = os.getenv("IPC_SOCKET")
+
+# Boot phase timings are written here as JSON once the bot is ready,
+# see benchmarks/bench_startup.py
+STARTUP_PROFILE_PATH = os.getenv("STARTUP_PROFILE_PATH")
+
+# Optional CSV of every connected guild, written once at startup
+GUILD_DUMP_PATH = os.getenv("GUILD_DUMP_PATH")
+
+# Which intents and caches to enable, see utils/cache_profile.py
+CACHE_PROFILE = os.getenv("CACHE_PROFILE", "moderation")
+
+# Hashes of the last synced command tree, used to skip redundant syncs
+COMMAND_MANIFEST_PATH = os.getenv("COMMAND_MANIFEST_PATH",
+                                  ".command_manifest.json")
+
+# Persistent warning storage
+WARN_DB_PATH = os.getenv("WARN_DB_PATH", "warns.db")
+WARN_SWEEP_INTERVAL = float(os.getenv("WARN_SWEEP_INTERVAL", "300"))
+WARN_SWEEP_SLICE_MS = float(os.getenv("WARN_SWEEP_SLICE_MS", "2"))
+WARN_CACHE_MAX_USERS = int(os.getenv("WARN_CACHE_MAX_USERS", "10000"))
+
+# Command extensions to load from cogs/. Leave some out for a slimmer
+# deployment, e.g. EXTENSIONS=moderation,admin
+EXTENSIONS = [
+    name.strip() for name in os.getenv(
+        "EXTENSIONS", "fun,moderation,utility,admin").split(",")
+    if name.strip()
+]
+
+# Per-guild escalation ladders and warn windows, see utils/escalation.py
+ESCALATION_POLICY_PATH = os.getenv("ESCALATION_POLICY_PATH", "escalation.json")
+
+
+class Villager(commands.AutoShardedBot):
     def __init__(self):
-        intents = discord.Intents.all()
+        self.cache_profile = get_profile(CACHE_PROFILE)
+        self.ready_once = False
+        self.started_at = time.monotonic()
+        self.startup = startup
+        self.shard_ready_after = {}
         self.is_syncing = False
+        self.command_manifest = CommandManifest(COMMAND_MANIFEST_PATH)
+        self.warn_store = SQLiteWarnStore(WARN_DB_PATH)
+        self.warn_cache = WarnCache(WARN_CACHE_MAX_USERS)
+        self.escalation = EscalationPolicies(ESCALATION_POLICY_PATH)
+        self.warns = WarnLedger(
+            self.warn_store, self.warn_cache,
+            lambda guild_id: self.escalation.for_guild(guild_id).window)
+        self.app_info = CachedValue(self.application_info, APP_INFO_TTL)
+        self.dev_channel = CachedValue(self._fetch_dev_channel, APP_INFO_TTL)
+        self.actions = ActionExecutor(ACTION_CONCURRENCY, ACTION_RETRIES)
+        self.loop_monitor = LoopMonitor(LOOP_LAG_INTERVAL,
+                                        SLOW_CALLBACK_THRESHOLD_MS / 1000,
+                                        SLOW_CALLBACK_LOG_INTERVAL)
+        self.metrics_server = MetricsServer(
+            lambda: render_bot_metrics(self), METRICS_HOST, METRICS_PORT)
+        self.reports_started = False
+        self.reports = ReportPipeline(self.dev_channel.get, REPORT_QUEUE_SIZE,
+                                      REPORT_FLUSH_SIZE, REPORT_FLUSH_INTERVAL,
+                                      REPORT_DEDUP_WINDOW)
+        self.extension_mtimes = {}
+        self.cluster_id = CLUSTER_ID
+        self.ipc = IPCClient(IPC_SOCKET, CLUSTER_ID) if IPC_SOCKET else None
         super().__init__(
             command_prefix='!',
-            intents=intents,
             dm_help=True,
-            owner_id=947551947735576627
+            owner_id=DEVELOPER_ID,
+            tree_cls=InstrumentedTree,
+            activity=discord.Game(name="Minecraft"),
+            shard_count=SHARD_COUNT,
+            shard_ids=SHARD_IDS,
+            **self.cache_profile.options()
         )
 
     async def setup_hook(self):
+        self.startup.mark("login")
+        self.escalation.load()
+        self.loop_monitor.start()
+        if METRICS_PORT:
+            try:
+                await self.metrics_server.start()
+                log.info("Serving metrics on %s:%d/metrics", METRICS_HOST,
+                         METRICS_PORT)
+            except OSError as e:
+                log.warning("Failed to start metrics server: %s", e)
+        if self.ipc:
+            self.ipc.on("stats", self.cluster_stats)
+            await self.ipc.start()
+        await self.load_extensions()
+        self.startup.mark("extensions")
+        await self.sync_commands()
+        self.startup.mark("setup")
+
+    async def load_extensions(self):
+        for name in EXTENSIONS:
+            await self.load_extension(f"cogs.{name}")
+        log.info("Loaded extension(s): %s", ", ".join(EXTENSIONS))
+
+    # Source mtimes are recorded on every (re)load so !reload can tell
+    # which extensions changed on disk since
+
+    def _source_mtime(self, name):
+        return os.stat(self.extensions[name].__file__).st_mtime_ns
+
+    async def load_extension(self, name, *, package=None):
+        await super().load_extension(name, package=package)
+        self.extension_mtimes[name] = self._source_mtime(name)
+
+    async def reload_extension(self, name, *, package=None):
+        await super().reload_extension(name, package=package)
+        self.extension_mtimes[name] = self._source_mtime(name)
+
+    async def unload_extension(self, name, *, package=None):
+        await super().unload_extension(name, package=package)
+        self.extension_mtimes.pop(name, None)
+
+    def changed_extensions(self):
+        """Loaded extensions whose source file changed since they loaded."""
+        changed = []
+        for name, mtime in self.extension_mtimes.items():
+            try:
+                if self._source_mtime(name) != mtime:
+                    changed.append(name)
+            except OSError:
+                # Deleted or unreadable, let the reload report why
+                changed.append(name)
+        return changed
+
+    async def start_warnings(self):
+        """Open warning storage, once, for the cogs that need it.
+
+        The store and cache live on the bot rather than in a cog so
+        reloading an extension doesn't lose or reopen them.
+        """
+        if self.sweep_warns.is_running():
+            return
+        await self.warn_store.open()
+        self.sweep_warns.start()
+
+    def reload_escalation(self):
+        """Reload the policy file and drop cache shards it made stale.
+
+        A cached deque only holds warns inside the window it was loaded
+        with, so guilds whose window changed are reloaded from the store.
+        Returns the number of guilds dropped from the cache.
+        """
+        windows = {guild_id: self.escalation.for_guild(guild_id).window
+                   for guild_id in self.warn_cache.guilds()}
+        self.escalation.load()
+        stale = [guild_id for guild_id, window in windows.items()
+                 if self.escalation.for_guild(guild_id).window != window]
+        for guild_id in stale:
+            self.warn_cache.clear(guild_id)
+        return len(stale)
+
+    async def start_reports(self):
+        """Prefetch report targets and start delivering reports, once.
+
+        Only the utility cog takes reports, so deployments without it skip
+        the two REST calls and the refresh tasks.
+        """
+        if self.reports_started:
+            return
+        self.reports_started = True
+        for cached in (self.app_info, self.dev_channel):
+            try:
+                await cached.refresh()
+            except discord.HTTPException as e:
+                log.warning("Failed to prefetch report targets: %s", e)
+            cached.start()
+        self.reports.start()
+
+    def escalation_actions(self, user, warnings, channel, notify=True):
+        step = self.escalation.for_guild(user.guild.id).lookup(warnings)
+        if step is None:
+            return []
+        reason = f"Received {warnings} warnings."
+        if step.action == "timeout":
+            time_delta = step.duration
+            if not notify:
+                return [("timeout", lambda: user.timeout(time_delta, reason=reason))]
+            # Only announce the timeout once it has actually been applied
+            return [("timeout", [
+                ("timeout", lambda: user.timeout(time_delta, reason=reason)),
+                ("notify", lambda: channel.send(
+                    f"{user.mention} has been timed out for {format_duration(time_delta)}."
+                )),
+            ])]
+        if step.action == "kick":
+            return [("kick", lambda: user.kick(reason=reason))]
+        return [("ban", lambda: user.ban(reason=reason))]
+
+    async def before_identify_hook(self, shard_id, *, initial=False):
+        # Other clusters identify with the same token, so the launcher's
+        # broker paces identifies for all of them
+        if not (self.ipc and await self.ipc.identify(shard_id)):
+            await super().before_identify_hook(shard_id, initial=initial)
+        self.startup.mark_shard(shard_id, "identify")
+
+    async def on_shard_connect(self, shard_id):
+        self.startup.mark_shard(shard_id, "connected")
+
+    async def cluster_stats(self, data=None):
+        return {
+            "cluster_id": CLUSTER_ID,
+            "shards": [shard_id for shard_id, _ in self.latencies],
+            "guilds": len(self.guilds),
+            "members": sum(guild.member_count or 0 for guild in self.guilds),
+            "latency_ms": round(self.latency * 1000, 1),
+            "loop_lag_ms": round(self.loop_monitor.lag * 1000, 1),
+            "warn_cache_users": len(self.warn_cache),
+        }
+
+    async def _fetch_dev_channel(self):
+        dev = await self.fetch_user(DEVELOPER_ID)
+        return await dev.create_dm()
+
+    async def sync_commands(self):
+        self.tree.default_permissions = None
+        if CLUSTER_ID != 0:
+            sync_log.info("Leaving the startup sync to cluster 0")
+            return
+        hashes = command_hashes(self.tree)
+        if self.command_manifest.is_current("global", hashes):
+            sync_log.info("Commands unchanged since last sync, skipping sync")
+            return
         try:
-            print("🔄 Syncing commands...")
+            sync_log.info("Syncing commands")
             self.is_syncing = True  # Set flag when sync starts
-            await asyncio.sleep(1)
-            self.tree.default_permissions = None
             synced = await self.tree.sync()
-            print(f"✅ Successfully synced {len(synced)} command(s)")
+            self.command_manifest.record("global", hashes)
+            sync_log.info("Synced %d command(s)", len(synced))
             self.is_syncing = False  # Set flag when sync completes
-        except Exception as e:
-            print(f"❌ Failed to sync commands: {e}")
+        except Exception:
+            sync_log.exception("Failed to sync commands")
             self.is_syncing = False  # Make sure to set flag even if sync fails
 
+    async def close(self):
+        self.sweep_warns.cancel()
+        self.app_info.stop()
+        self.dev_channel.stop()
+        await self.reports.stop()
+        await self.actions.close()
+        await self.metrics_server.stop()
+        self.loop_monitor.stop()
+        if self.ipc:
+            await self.ipc.stop()
+        await super().close()
+        await self.warn_store.close()
+
+    @tasks.loop(seconds=WARN_SWEEP_INTERVAL)
+    async def sweep_warns(self):
+        now = datetime.now().timestamp()
+        stats = await self.warn_cache.sweep(lambda guild_id: self.warns.cutoff(guild_id, now),
+                                            WARN_SWEEP_SLICE_MS / 1000)
+        if stats["reclaimed"] or stats["dropped_keys"]:
+            warn_log.info(
+                "Swept warn cache: reclaimed %d warn(s), dropped %d user(s) "
+                "in %.1f ms", stats["reclaimed"], stats["dropped_keys"],
+                stats["duration"] * 1000, extra=stats)
+
+    async def on_shard_ready(self, shard_id):
+        if shard_id in self.shard_ready_after:
+            return
+        self.startup.mark_shard(shard_id, "guilds")
+        self.shard_ready_after[shard_id] = time.monotonic() - self.started_at
+        log.info("Shard %d ready after %.1f s", shard_id,
+                 self.shard_ready_after[shard_id],
+                 extra={"shard_id": shard_id,
+                        "ready_after": self.shard_ready_after[shard_id]})
+
     async def on_ready(self):
+        # on_ready fires again after every reconnect that can't resume
+        if self.ready_once:
+            log.info("Reconnected to the gateway",
+                     extra={"guilds": len(self.guilds)})
+            return
+        self.ready_once = True
+        self.startup.mark("ready")
+
+        stats = summarize_guilds(self.guilds)
+        stats["shards"] = [{
+            "shard_id": shard_id,
+            "guilds": stats["shard_guilds"].get(shard_id, 0),
+            "ready_after": self.shard_ready_after.get(shard_id),
+            "latency_ms": round(latency * 1000, 1),
+        } for shard_id, latency in self.latencies]
+        del stats["shard_guilds"]
+        stats["startup"] = self.startup.summary()
+        log.info(
+            "%s is ready and online: %d guild(s) on %d shard(s), %d "
+            "member(s), largest guild %s", self.user, stats["guilds"],
+            len(stats["shards"]), stats["members"],
+            stats["largest_guild_id"], extra=stats)
+        for name, build in PROFILES.items():
+            estimate = build().estimate(stats["guilds"], stats["members"])
+            marker = " (active)" if name == self.cache_profile.name else ""
+            log.info("Estimated cache footprint for '%s'%s: %.1f MiB", name,
+                     marker, estimate / 2**20,
+                     extra={"profile": name, "bytes": estimate})
+        log.info("Started in %.2f s: %s", stats["startup"]["total"],
+                 self.startup.describe(), extra=stats["startup"])
+        if STARTUP_PROFILE_PATH:
+            self.startup_dump = asyncio.create_task(
+                dump_startup(STARTUP_PROFILE_PATH, stats["startup"]))
+        if GUILD_DUMP_PATH:
+            rows = [(guild.id, guild.name, guild.member_count)
+                    for guild in self.guilds]
+            self.guild_dump = asyncio.create_task(
+                dump_guilds(GUILD_DUMP_PATH, rows))
+
         channel = self.get_channel(1366904232317550683)
-        print(f'✅ {self.user} is ready and online!')
         if channel:
             await channel.send(
                 f"{self.user.mention} has been successfully deployed.")
-        await self.change_presence(activity=discord.Game(name="Minecraft"))
-        for guild in self.guilds:
-            print(
-                f"Connected to guild: {guild.name} (ID: {guild.id}, Member Count: {guild.member_count})"
-            )
-        print(f"Total visible guilds: {len(self.guilds)}")
 
+    async def on_command_error(self, ctx, error):
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.send(
+                "Nice try, but you don't have permission to use this command.")
+        elif isinstance(error, commands.CommandNotFound):
+            await ctx.send("Command not found.")
+        else:
+            await ctx.send("An error occurred.")
+            raise error
+
+
+def summarize_guilds(guilds):
+    members = unavailable = 0
+    largest = None
+    shard_guilds = {}
+    for guild in guilds:
+        shard_guilds[guild.shard_id] = shard_guilds.get(guild.shard_id, 0) + 1
+        if guild.unavailable:
+            unavailable += 1
+            continue
+        count = guild.member_count or 0
+        members += count
+        if largest is None or count > (largest.member_count or 0):
+            largest = guild
+    return {
+        "guilds": len(guilds),
+        "unavailable_guilds": unavailable,
+        "members": members,
+        "largest_guild_id": largest.id if largest else None,
+        "largest_guild_members": largest.member_count if largest else 0,
+        "shard_guilds": shard_guilds,
+    }
+
+
+def _write_guild_dump(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["guild_id", "name", "member_count"])
+        writer.writerows(rows)
+
+
+async def dump_guilds(path, rows):
+    try:
+        await asyncio.to_thread(_write_guild_dump, path, rows)
+    except OSError as e:
+        log.warning("Failed to write guild list to %s: %s", path, e)
+    else:
+        log.info("Wrote %d guild(s) to %s", len(rows), path)
 
-bot = Villager()
 
-
-@bot.tree.command(name="hello", description="Say hello to the villager!")
-async def hello(interaction: discord.Interaction):
-    await interaction.response.send_message(
-        f"Hrmmm! Hello {interaction.user.mention}!")
-
-
-@bot.tree.command(name="ping", description="Check bot's latency")
-async def ping(interaction: discord.Interaction):
-    await interaction.response.send_message(
-        f"🏓  **Latency:** {round(bot.latency * 1000)} ms  🏓")
-
-
-@bot.tree.command(name="serverinfo",
-                  description="Get information about the server",
-                  )
-async def serverinfo(interaction: discord.Interaction):
-    server = interaction.guild
-    embed = discord.Embed(title=f"Info about {server.name}:",
-                          color=discord.Color.green())
-    embed.add_field(name="Server Owner",
-                    value=server.owner.mention,
-                    inline=False)
-    embed.add_field(name="Member Count",
-                    value=server.member_count,
-                    inline=True)
-    embed.add_field(name="Created At",
-                    value=server.created_at.strftime("%B %d, %Y"),
-                    inline=True)
-    embed.set_thumbnail(url=server.icon.url if server.icon else None)
-    await interaction.response.send_message(embed=embed)
-
-
-@bot.tree.command(name="report",
-                  description="Report a small issue to the creator/dev(s)",
-                  )
-@app_commands.describe(issue="The issue you want to report.")
-async def report(interaction: discord.Interaction, issue: str):
-    dev = await bot.fetch_user(947551947735576627)
-    app_info = await bot.application_info()
-    owner = app_info.owner
-    await interaction.response.send_message(
-        f"✅ Your bug has been reported to {owner.name}.", ephemeral=True)
-    await dev.send(
-        f"{interaction.user} reported a bug in the bot!\nThey said: '" + issue +
-        "'.")
-
-
-@bot.tree.command(name="speak", description="Make the bot say anything")
-@app_commands.describe(
-    message="The message the bot will say.",
-    channel="(Optional) The channel to send the message in.")
-async def speak(interaction: discord.Interaction,
-                message: str,
-                channel: discord.TextChannel = None):
-    # Check if user has permissions or is the bot owner
-    is_authorized = (interaction.user.guild_permissions.kick_members
-                     or await bot.is_owner(interaction.user))
-
-    if not is_authorized:
-        await interaction.response.send_message(
-            f"Nice try, {interaction.user.mention}, but you don't have permission to use this command.",
-            ephemeral=True)
-        return
-
-    if channel:
-        await interaction.response.defer(ephemeral=True)
-        await channel.send(message)
-        await interaction.followup.send(f"✅ Sent message ({message}) in {channel.mention}",
-                                        ephemeral=True)
-    else:
-        await interaction.response.send_message(f"✅ Sent message ({message})",
-                                                ephemeral=True)
-        await interaction.channel.send(message)
-
-
-@bot.tree.command(
-    name="fight",
-    description="Fight people using ANY custom move (just for fun)",
-    )
-@app_commands.describe(user="The user you want to attack",
-                       attack="The attack you want to do")
-async def fight(interaction: discord.Interaction, user: Member, attack: str):
-    if user == interaction.client.user:
-        await interaction.response.send_message("😡 Hrmm! *punches you*")
-    else:
-        await interaction.response.send_message(
-            f"{user.mention}! {interaction.user.mention} has done '{attack}' to you!"
-        )
+def _write_startup_profile(path, summary):
+    with open(path, "w") as f:
+        json.dump(summary, f, indent=2)
 
 
-@bot.tree.command(name="coinflip", description="Flip a coin")
-async def coinflip(interaction: discord.Interaction):
-    await interaction.response.send_message(
-        f"The coin landed on {random.choice(['heads', 'tails'])}.")
-
-
-@bot.tree.command(name="8ball", description="Ask the 8ball a question")
-@app_commands.describe(question="The question you want to ask the 8ball")
-async def eightball(interaction: discord.Interaction, question: str):
-    responses = [
-        "It is certain.", "It is decidedly so.", "Without a doubt.",
-        "Yes - definitely.", "You may rely on it.", "As I see it, yes.",
-        "Most likely.", "Outlook good.", "Yes.", "Signs point to yes.",
-        "Reply hazy, try again.", "Ask again later.",
-        "Better not tell you now.", "Cannot predict now.",
-        "Concentrate and ask again.", "Don't count on it.", "My reply is no.",
-        "My sources say no.", "Outlook not so good.", "Very doubtful.", "Absolutely not, you idiot.",
-        "Obviously.", "I don't want to answer this question.", "No.", "h̵̡̨̛̺̲͍̞͇̳̹̪̽̐̃̇̀́̽̋̀͐̈͌̋̚̕͜͜͝͝a̷̹̺̪͎̬͉̟̹͖̦͚̖̓̏̕ͅh̵̡̳̗̲̲͍̺̙͎͈͚̱͈̽̐͒̀̈́͑̊̕̕̚ͅä̷̢̧̛̛̻̺̫̻̭̙͔͇̯̖̮̩̱̻̲͈̎̋̍͛͊̈̈̀́̋͗̌̒͘ḩ̴̞̞͓̘̖̱͚̼̣͍̤̯̻̣͖̭͈̊̌͑̉̆͗̾͒ą̵̦̹̬̼̘̭͕͈͍̠̹̰̪̻̳̮͚̓̋̽̚̚h̵̯̰̤̤̝̜͔̥̝̙̳̰͈̭̤̗̹̓͊̒̆̒ͅͅa̸̟̮̒̀̀̃̈́̿͑͆͠ẖ̸̠̝̣̋̇́̂̋͗̈́͋̒͆̕͜ͅͅḁ̴̭̗̗͖̩̳͚͎̈́̑͛̉̾̀͒͊̃̒́̏̒͐͂̓͜h̵̹̠̝̽ä̸̢̡̨̡̛͈̹̝͈̭̺̤͇̳̹̼̦̝́̇̒̋̓̀͌̈́̿͂͒̊̾̑͆͘͟͝ḩ̷̞͖̿̽͘a̷̦͉̦̼̞̱͗̆́̈̓̈̿̀̕͘͠h̶̨̨̡̨̛̝̞̭̣̖̗͖͕̰̠̻͍̝͚͗̄̄͐̏̌̌͆̅̀̓̉̈́̕a̸̡̙̲̥̙̪̖̲̘̣͍͖̬̱̐́̂̐͑̀̈́͒͌̓͂̍̄̚̕͝h̷̰̯͉̻̝͓̥̙̞̆͌̔̾̐̐͆́͂̒̀ą̷͍͎̮͙͈̥̬̜͉̫͋͛̒̈́̆̾̂̚͠ḧ̵̡̢̨͈͇͍̹̣͚̮͕̫̮́̎̊̈́͊͒́̈́͛͛̆͐͊̉̑̚͠͝͠ā̷̢͈̯̮͇̫̯͉̯̤̼͔̼̲̞̰̍́͐̄̐̆̐͑̍͆̅͋͊̀͑̕̕h̴͉̜̤̞͔̗͛̑̄́̾͆͋͒̿̎̈́ȁ̴̦͍͉͙͈̬͕̯̼̻̙̱̬̰̎̀̉̂̄̓̓h̸̡̫͍̳̘̠̖̥̞̜̯̠̲͌́̂̇͝ḁ̷͉͊̌̇̏̑̇̾̂̓̔̄̂͂̋̚̕"
-    ]
-    embed = discord.Embed(title="🎱 8ball 🎱", color=discord.Color.blue())
-    embed.add_field(name="Question",
-                    value=f"{interaction.user.mention} asked: '{question}'",
-                    inline=False)
-    embed.add_field(name="Answer",
-                    value=f"The 8ball says: '{random.choice(responses)}'",
-                    inline=False)
-    await interaction.response.send_message(embed=embed)
-
-
-
-@bot.tree.command(name="choice", description="Make the bot pick one out of a list of choices! (Max 5)")
-@app_commands.describe(choice1="Choice 1",
-                       choice2="Choice 2",
-                       choice3="Choice 3",
-                       choice4="Choice 4",
-                       choice5="Choice 5")
-async def choice(interaction: discord.Interaction,
-                 choice1:str,
-                 choice2:str,
-                 choice3:str=None,
-                 choice4:str=None,
-                 choice5:str=None):
-    choices = [choice1, choice2, choice3, choice4, choice5]
-    await interaction.response.send_message(f"The bot has picked: {random.choice(choices)}")
-
-
-@bot.tree.command(name="warn", description="Warn a user")
-@app_commands.describe(user="The user you want to warn",
-                       reason="The reason for the warn")
-async def warn(interaction: discord.Interaction,
-               user: Member,
-               reason: str = None):
-
-    # Check if user has permissions or is the bot owner
-    is_authorized = (interaction.user.guild_permissions.kick_members
-                     or await bot.is_owner(interaction.user))
-
-    if not is_authorized:
-        await interaction.response.send_message(
-            f"Nice try, {interaction.user.mention}, but you don't have permission to use this command.",
-            ephemeral=True)
-        return
-
-    user_id = user.id
-    prune_old_warns(user_id)  # Remove expired warns
-
-    if user_id not in warns:
-        warns[user_id] = []
-
-    warns[user_id].append(datetime.now())
-
-    await interaction.response.send_message(
-        f"⚠️ {user.mention} has been warned. Reason: {reason}. They now have {len(warns[user_id])} warn(s). ⚠️"
-    )
-
-    warnings = len(warns[user_id])
-    channel = bot.get_channel(1358592562620796981)
-
-    if channel:
-        if 1 < warnings <= 4:
-            time_delta = timedelta(
-                days=1 if warnings == 2 else 7 if warnings == 3 else 3)
-            await user.timeout(time_delta,
-                               reason=f"Received {warnings} warnings.")
-            await channel.send(
-                f"{user.mention} has been timed out for {time_delta.days} day(s)."
-            )
-        if warnings == 5:
-            await user.ban(reason=f"Received {warnings} warns.")
-
-
-@bot.tree.command(name="removewarns",
-                  description="Remove a warning from a user.")
-@app_commands.describe(user="The user whose warn you want to remove",
-                       amount="The number of warns to remove")
-async def removewarns(interaction: discord.Interaction, user: Member,
-                      amount: int):
-    await interaction.response.defer(ephemeral=True)
-    user_id = user.id
-    prune_old_warns(user_id)
-
-    if not interaction.user.guild_permissions.kick_members:
-        await interaction.followup.send(
-            f"Nice try, {interaction.user.mention}, but you don't have permission to use this command.",
-            ephemeral=True)
-        return
-
-    if user_id not in warns or len(warns[user_id]) == 0:
-        await interaction.followup.send(
-            f"{user.mention} doesn't have any warns to remove.",
-            ephemeral=True)
-        return
-
-    if amount <= 0:
-        await interaction.followup.send(
-            "You must specify a positive number to remove.", ephemeral=True)
-        return
-
-    if len(warns[user_id]) < amount:
-        await interaction.followup.send(
-            f"{user.mention} only has {len(warns[user_id])} warns, can't remove {amount}.",
-            ephemeral=True)
-        return
-
-    warns[user_id] = warns[user_id][:-amount]
-    if not warns[user_id]:
-        del warns[user_id]
-
-    await interaction.followup.send(
-        f"✅ {amount} warns have been removed from {user.mention}. They now have {len(warns.get(user_id, []))} warns.",
-        ephemeral=True)
-
-
-@bot.tree.command(name="checkwarns",
-                  description="Check how many warnings a user has.")
-@app_commands.describe(user="The user whose warnings you want to check")
-async def checkwarns(interaction: discord.Interaction, user: Member):
-    user_id = user.id
-    prune_old_warns(user_id)
-
-    # Check if user has permissions or is the bot owner
-    is_authorized = (interaction.user.guild_permissions.kick_members
-                     or await bot.is_owner(interaction.user))
-
-    if not is_authorized:
-        await interaction.response.send_message(
-            f"Nice try, {interaction.user.mention}, but you don't have permission to use this command.",
-            ephemeral=True)
-        return
-
-    if user_id not in warns or len(warns[user_id]) == 0:
-        await interaction.response.send_message(
-            f"{user.mention} has no warnings.", ephemeral=True)
-        return
-
-    warnings = len(warns[user_id])
-    await interaction.response.send_message(
-        f"{user.mention} has {warnings} warning(s).", ephemeral=True)
-    
-
-@bot.tree.command(name="slap",
-                  description="Slap someone!",
-                  )
-@app_commands.describe(user="The user who you want to slap.")
-@app_commands.choices(tool=[
-    app_commands.Choice(name="Hand", value="Hand"),
-    app_commands.Choice(name="Fish", value="Fish"),
-    app_commands.Choice(name="Sock", value="Sock")])
-async def slap(interaction: discord.Interaction, user: Member, tool: app_commands.Choice[str]):
-    if tool.value == "Hand":
-        message = f"{user.mention}! {interaction.user.mention} slapped you! Are you going to retaliate?"
-    elif tool.value in ["Fish", "Sock"]:
-        message = f"{user.mention}! {interaction.user.mention} slapped you with a {tool.value}! Will you retaliate?"
-    await interaction.response.send_message(message) 
-       
-@bot.command()
-@commands.is_owner()
-async def sync(ctx):
-   try:
-        if not await bot.is_owner(ctx.author):
-            await ctx.send("❌ You must be the bot's owner to use this command!")
-            return
+async def dump_startup(path, summary):
+    try:
+        await asyncio.to_thread(_write_startup_profile, path, summary)
+    except OSError as e:
+        log.warning("Failed to write startup profile to %s: %s", path, e)
 
-        print("🔄 Manual sync initiated")
-        sync_msg = await ctx.send("🔄 Manual sync initiated, please wait...")
-        synced_commands = await bot.tree.sync()
-   
-        await sync_msg.edit(content=f"✅ Successfully synced {len(synced_commands)} commands.")
-        print(f"✅ Successfully synced {len(synced_commands)} commands.")
-
-   except Exception as e:
-        print(f"❌ Failed to sync commands: {e}") 
-        await ctx.send(f"❌ Failed to sync commands: {e}")
-
-
-@bot.event
-async def on_command_error(ctx, error):
-    if isinstance(error, commands.MissingPermissions):
-        await ctx.send(
-            "Nice try, but you don't have permission to use this command.")
-    elif isinstance(error, commands.CommandNotFound):
-        await ctx.send("Command not found.")
-    else:
-        await ctx.send("An error occurred.")
-        raise error
 
+bot = Villager()
+startup.mark("init")
 
-bot.run(TOKEN)
+if __name__ == "__main__":
+    bot.run(TOKEN, log_handler=None)
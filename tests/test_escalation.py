@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+
+from utils.escalation import (DEFAULT_POLICY, EscalationPolicies, Step,
+                              compile_policy, format_duration)
+
+
+class FormatDurationTest(unittest.TestCase):
+
+    def test_picks_the_largest_whole_unit(self):
+        self.assertEqual(format_duration(timedelta(days=3)), "3 day(s)")
+        self.assertEqual(format_duration(timedelta(hours=36)), "36 hour(s)")
+        self.assertEqual(format_duration(timedelta(hours=2)), "2 hour(s)")
+        self.assertEqual(format_duration(timedelta(minutes=90)),
+                         "90 minute(s)")
+
+
+class CompilePolicyTest(unittest.TestCase):
+
+    def test_default_policy_table(self):
+        policy = compile_policy(DEFAULT_POLICY)
+        self.assertEqual(policy.window, timedelta(days=7).total_seconds())
+        self.assertIsNone(policy.lookup(1))
+        self.assertEqual(policy.lookup(2), Step("timeout", timedelta(days=1)))
+        self.assertEqual(policy.lookup(5), Step("ban"))
+        # Past the last step nothing more happens
+        self.assertIsNone(policy.lookup(6))
+        self.assertIsNone(policy.lookup(-1))
+
+    def test_timeout_units_add_up(self):
+        policy = compile_policy({"steps": [
+            {"warnings": 1, "action": "timeout", "hours": 1, "minutes": 30},
+        ]})
+        self.assertEqual(policy.lookup(1).duration, timedelta(minutes=90))
+
+    def test_rejects_invalid_specs(self):
+        invalid = [
+            {"window_days": 0},
+            {"steps": [{"warnings": 0, "action": "kick"}]},
+            {"steps": [{"warnings": 1, "action": "mute"}]},
+            {"steps": [{"warnings": 1, "action": "kick"},
+                       {"warnings": 1, "action": "ban"}]},
+            {"steps": [{"warnings": 1, "action": "timeout"}]},
+            {"steps": [{"warnings": 1, "action": "timeout", "days": 29}]},
+        ]
+        for spec in invalid:
+            with self.subTest(spec=spec):
+                with self.assertRaises(ValueError):
+                    compile_policy(spec)
+
+
+class EscalationPoliciesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "escalation.json")
+        self.policies = EscalationPolicies(self.path)
+
+    def write(self, spec):
+        with open(self.path, "w") as f:
+            json.dump(spec, f)
+
+    def test_guild_overrides_default(self):
+        self.write({"guilds": {"7": {"window_days": 1, "steps": []}}})
+        self.policies.load()
+        self.assertEqual(self.policies.for_guild(7).window, 86400)
+        self.assertIs(self.policies.for_guild(8), self.policies.default)
+
+    def test_bad_file_keeps_current_policies(self):
+        self.write({"guilds": {"7": {"window_days": 1}}})
+        self.policies.load()
+        self.write({"guilds": {"7": {"window_days": -1}}})
+        with self.assertRaises(ValueError):
+            self.policies.load()
+        self.assertEqual(self.policies.for_guild(7).window, 86400)
@@ -0,0 +1,82 @@
+import unittest
+from unittest import mock
+
+from utils.reports import MESSAGE_LIMIT, ReportPipeline, _Report
+
+
+class _Channel:
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, content):
+        self.sent.append(content)
+
+
+class ReportPipelineTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.channel = _Channel()
+
+        async def get_channel():
+            return self.channel
+
+        self.pipeline = ReportPipeline(get_channel, max_queue=3,
+                                       dedup_window=60.0)
+
+    async def test_merges_pending_duplicates(self):
+        self.assertTrue(self.pipeline.submit("a", "It broke"))
+        # Case and surrounding whitespace don't make a report new
+        self.assertTrue(self.pipeline.submit("b", "  it BROKE "))
+        self.assertEqual(self.pipeline.stats["submitted"], 1)
+        self.assertEqual(self.pipeline.stats["duplicates"], 1)
+        await self.pipeline.stop()
+        self.assertEqual(self.channel.sent,
+                         ["📬 1 new bug report(s):\n• a said: 'It broke' (x2)"])
+
+    async def test_dedup_expires_after_window(self):
+        with mock.patch("utils.reports.time.monotonic") as monotonic:
+            monotonic.return_value = 100.0
+            self.pipeline.submit("a", "It broke")
+            await self.pipeline.stop()
+
+            monotonic.return_value = 159.0
+            self.pipeline.submit("a", "It broke")
+            self.assertEqual(self.pipeline.stats["duplicates"], 1)
+            self.assertEqual(self.pipeline.stats["queued"], 0)
+
+            monotonic.return_value = 161.0
+            self.pipeline.submit("a", "It broke")
+            self.assertEqual(self.pipeline.stats["submitted"], 2)
+            self.assertEqual(self.pipeline.stats["queued"], 1)
+
+    async def test_full_queue_drops(self):
+        for n in range(3):
+            self.assertTrue(self.pipeline.submit("a", f"issue {n}"))
+        self.assertFalse(self.pipeline.submit("a", "issue 3"))
+        self.assertEqual(self.pipeline.stats["dropped"], 1)
+
+    async def test_failed_delivery_is_counted(self):
+        async def get_channel():
+            raise RuntimeError("no channel")
+
+        pipeline = ReportPipeline(get_channel)
+        pipeline.submit("a", "It broke")
+        with self.assertLogs("villager.reports", "ERROR"):
+            await pipeline.stop()
+        self.assertEqual(pipeline.stats["failed"], 1)
+        self.assertEqual(pipeline.stats["delivered"], 0)
+
+    def test_digests_split_at_message_limit(self):
+        batch = [_Report(str(n), "a", "x" * 900) for n in range(5)]
+        digests = list(self.pipeline._digests(batch))
+        self.assertGreater(len(digests), 1)
+        self.assertTrue(all(len(d) <= MESSAGE_LIMIT for d in digests))
+        self.assertTrue(digests[0].startswith("📬 5 new bug report(s):"))
+        # Every report lands in exactly one digest
+        self.assertEqual(sum(d.count("• a said:") for d in digests), 5)
+
+    def test_long_report_is_truncated(self):
+        line = _Report("k", "a", "x" * 3000).render()
+        self.assertEqual(len(line), MESSAGE_LIMIT)
+        self.assertTrue(line.endswith("…"))
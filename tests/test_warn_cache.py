@@ -0,0 +1,168 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from utils.warn_cache import WarnCache
+from utils.warn_store import SQLiteWarnStore
+from utils.warns import WarnLedger
+
+
+async def _fail(*args, **kwargs):
+    raise sqlite3.OperationalError("database is locked")
+
+
+class WarnCacheTest(unittest.IsolatedAsyncioTestCase):
+
+    def test_get_expires_only_the_old_prefix(self):
+        cache = WarnCache()
+        cache.load(1, 10, [100, 200, 300])
+        self.assertEqual(list(cache.get(1, 10, 150)), [200, 300])
+        self.assertEqual(list(cache.get(1, 10, 400)), [])
+        self.assertIsNone(cache.get(1, 11, 0))
+        self.assertIsNone(cache.get(2, 10, 0))
+
+    def test_load_keeps_warns_appended_while_loading(self):
+        cache = WarnCache()
+        warns = cache.load(1, 10, [100])
+        warns.append(200)
+        # A second lookup's store query finished after the append
+        self.assertIs(cache.load(1, 10, [100]), warns)
+        self.assertEqual(list(cache.get(1, 10, 0)), [100, 200])
+
+    def test_evicts_least_recently_used_user(self):
+        cache = WarnCache(max_users=2)
+        cache.load(1, 10, [100])
+        cache.load(1, 11, [100])
+        cache.get(1, 10, 0)
+        cache.load(1, 12, [100])
+        self.assertIsNone(cache.get(1, 11, 0))
+        self.assertIsNotNone(cache.get(1, 10, 0))
+        self.assertIsNotNone(cache.get(1, 12, 0))
+        self.assertEqual(cache.users(1), 2)
+
+    def test_remove_latest_drops_newest(self):
+        cache = WarnCache()
+        cache.load(1, 10, [100, 200, 300])
+        cache.remove_latest(1, 10, 2)
+        self.assertEqual(list(cache.get(1, 10, 0)), [100])
+        cache.remove_latest(1, 10, 5)
+        self.assertIsNone(cache.get(1, 10, 0))
+
+    async def test_sweep_counts_reclaimed_and_dropped(self):
+        cache = WarnCache()
+        cache.load(1, 10, [100, 200, 300])
+        cache.load(1, 11, [100])
+        cache.load(2, 10, [100])
+        cutoffs = {1: 150, 2: 50}
+        stats = await cache.sweep(cutoffs.get, time_slice=0)
+        self.assertEqual(stats["reclaimed"], 2)
+        self.assertEqual(stats["dropped_keys"], 1)
+        self.assertEqual(list(cache.get(1, 10, 0)), [200, 300])
+        self.assertEqual(len(cache), 2)
+
+        stats = await cache.sweep(lambda guild_id: 1000, time_slice=0)
+        self.assertEqual((stats["reclaimed"], stats["dropped_keys"]), (3, 2))
+        self.assertEqual(cache.guilds(), [])
+
+
+class SQLiteWarnStoreTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        workdir = tempfile.mkdtemp()
+        self.store = SQLiteWarnStore(os.path.join(workdir, "warns.db"))
+        await self.store.open()
+
+    async def asyncTearDown(self):
+        await self.store.close()
+
+    async def test_active_is_ordered_and_windowed(self):
+        for issued_at in (300, 100, 200):
+            await self.store.add(1, 10, issued_at)
+        await self.store.add(1, 11, 250)
+        await self.store.add(2, 10, 250)
+        self.assertEqual(await self.store.active(1, 10, 0), [100, 200, 300])
+        self.assertEqual(await self.store.active(1, 10, 150), [200, 300])
+
+    async def test_remove_latest_stays_inside_window(self):
+        for issued_at in (100, 200, 300):
+            await self.store.add(1, 10, issued_at)
+        self.assertEqual(await self.store.remove_latest(1, 10, 1, 150), 1)
+        self.assertEqual(await self.store.active(1, 10, 0), [100, 200])
+        # Only 200 is inside the window, 100 has already expired
+        self.assertEqual(await self.store.remove_latest(1, 10, 5, 150), 1)
+        self.assertEqual(await self.store.active(1, 10, 0), [100])
+
+    async def test_clear_many_and_active_many(self):
+        await self.store.add_many(1, [10, 11, 12], 200)
+        await self.store.add(1, 10, 100)
+        self.assertEqual(await self.store.clear_many(1, [10, 11], 150), 2)
+        self.assertEqual(await self.store.active_many(1, [10, 11, 12], 0),
+                         {10: [100], 11: [], 12: [200]})
+
+    async def test_summary_and_export_are_limited_but_report_totals(self):
+        await self.store.add_many(1, [10, 11, 12], 200)
+        await self.store.add(1, 11, 300)
+        await self.store.add(1, 12, 100)
+        rows, total = await self.store.summary(1, 150, 1)
+        self.assertEqual((rows, total), ([(11, 2)], 3))
+        rows, total = await self.store.export(1, 2)
+        self.assertEqual(total, 5)
+        self.assertEqual([row[:2] for row in rows], [(10, 200), (11, 200)])
+
+
+class WarnLedgerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        workdir = tempfile.mkdtemp()
+        self.store = SQLiteWarnStore(os.path.join(workdir, "warns.db"))
+        await self.store.open()
+        self.cache = WarnCache()
+        self.ledger = WarnLedger(self.store, self.cache, lambda guild_id: 1000)
+
+    async def asyncTearDown(self):
+        await self.store.close()
+
+    async def test_add_reads_through_and_appends(self):
+        await self.store.add(1, 10, 100)
+        await self.store.add(1, 10, 500)
+        # 100 is outside the 1000 s window
+        self.assertEqual(list(await self.ledger.add(1, 10, 1200)), [500, 1200])
+        self.assertEqual(list(await self.ledger.add(1, 10, 1300)),
+                         [500, 1200, 1300])
+        self.assertEqual(await self.store.active(1, 10, 0),
+                         [100, 500, 1200, 1300])
+
+    async def test_failed_add_leaves_cache_unchanged(self):
+        await self.ledger.add(1, 10, 100)
+        self.store.add = _fail
+        with self.assertRaises(sqlite3.OperationalError):
+            await self.ledger.add(1, 10, 200)
+        self.assertEqual(list(self.cache.get(1, 10, 0)), [100])
+
+    async def test_failed_add_many_leaves_cache_unchanged(self):
+        await self.ledger.add(1, 10, 100)
+        self.store.add_many = _fail
+        with self.assertRaises(sqlite3.OperationalError):
+            await self.ledger.add_many(1, [10, 11], 200)
+        self.assertEqual(list(self.cache.get(1, 10, 0)), [100])
+        self.assertEqual(list(self.cache.get(1, 11, 0)), [])
+
+    async def test_failed_remove_leaves_cache_unchanged(self):
+        await self.ledger.add_many(1, [10], 100)
+        await self.ledger.add_many(1, [10], 200)
+        self.store.remove_latest = _fail
+        with self.assertRaises(sqlite3.OperationalError):
+            await self.ledger.remove_latest(1, 10, 1, 300)
+        self.assertEqual(list(self.cache.get(1, 10, 0)), [100, 200])
+
+    async def test_remove_latest_trims_what_the_store_removed(self):
+        for issued_at in (100, 200, 300):
+            await self.ledger.add(1, 10, issued_at)
+        self.assertEqual(await self.ledger.remove_latest(1, 10, 2, 1000), 2)
+        self.assertEqual(list(self.cache.get(1, 10, 0)), [100])
+        self.assertEqual(await self.store.active(1, 10, 0), [100])
+
+
+if __name__ == "__main__":
+    unittest.main()
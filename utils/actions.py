@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import random
+import time
+
+import discord
+
+log = logging.getLogger("villager.actions")
+
+
+def _retryable(error):
+    return isinstance(error, discord.HTTPException) and (
+        error.status == 429 or error.status >= 500)
+
+
+class ActionExecutor:
+    """Run moderation side effects off the interaction handler.
+
+    Actions submitted together run concurrently, bounded by
+    `concurrency` across all submissions. An action can also be a list
+    of (name, action) steps that depend on each other: they run in order
+    and stop at the first failure. Rate limits and server errors are
+    retried with full-jitter exponential backoff.
+    """
+
+    def __init__(self, concurrency=10, retries=3, base_delay=0.5,
+                 max_delay=10.0):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._tasks = set()
+        # name -> [calls, failures, total seconds, max seconds]
+        self.latencies = {}
+
+    def _record(self, name, elapsed, failed):
+        stats = self.latencies.get(name)
+        if stats is None:
+            stats = self.latencies[name] = [0, 0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += failed
+        stats[2] += elapsed
+        if elapsed > stats[3]:
+            stats[3] = elapsed
+
+    async def run(self, name, action):
+        """Await `action()`, retrying on 429 and 5xx responses."""
+        started = time.perf_counter()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    async with self._semaphore:
+                        result = await action()
+                except Exception as e:
+                    if attempt >= self.retries or not _retryable(e):
+                        raise
+                    delay = min(self.max_delay, self.base_delay * 2**attempt)
+                    attempt += 1
+                    await asyncio.sleep(random.uniform(0, delay))
+                else:
+                    self._record(name, time.perf_counter() - started, False)
+                    return result
+        except Exception:
+            self._record(name, time.perf_counter() - started, True)
+            raise
+
+    async def run_steps(self, steps):
+        """Run (name, action) steps in order, returning the last result."""
+        result = None
+        for name, action in steps:
+            result = await self.run(name, action)
+        return result
+
+    async def gather(self, actions):
+        """Run (name, action) pairs concurrently, returning results or errors."""
+        results = await asyncio.gather(
+            *(self.run_steps(action) if isinstance(action, list)
+              else self.run(name, action) for name, action in actions),
+            return_exceptions=True)
+        for (name, _), result in zip(actions, results):
+            if isinstance(result, Exception):
+                log.error("Action %s failed: %s", name, result,
+                          extra={"action": name})
+        return results
+
+    def submit(self, actions):
+        """Schedule actions without waiting for them."""
+        if not actions:
+            return None
+        task = asyncio.create_task(self.gather(actions))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def close(self):
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=10)
@@ -0,0 +1,85 @@
+from typing import NamedTuple, Optional
+
+import discord
+
+# Rough per-object costs measured on CPython 3.12 with discord.py 2.x.
+# Only meant for comparing profiles, not for exact accounting.
+GUILD_BYTES = 4_096
+MEMBER_BYTES = 1_200
+PRESENCE_BYTES = 800
+MESSAGE_BYTES = 3_500
+
+
+class CacheProfile(NamedTuple):
+    name: str
+    intents: discord.Intents
+    member_cache_flags: discord.MemberCacheFlags
+    max_messages: Optional[int]
+    chunk_guilds_at_startup: bool
+
+    def options(self):
+        return {
+            "intents": self.intents,
+            "member_cache_flags": self.member_cache_flags,
+            "max_messages": self.max_messages,
+            "chunk_guilds_at_startup": self.chunk_guilds_at_startup,
+        }
+
+    def estimate(self, guild_count, member_count):
+        """Upper bound of cache bytes once every member has been seen."""
+        size = guild_count * GUILD_BYTES
+        if self.member_cache_flags.joined:
+            size += member_count * MEMBER_BYTES
+        if self.intents.presences:
+            size += member_count * PRESENCE_BYTES
+        if self.max_messages:
+            size += self.max_messages * MESSAGE_BYTES
+        return size
+
+
+def _minimal():
+    # Slash commands only need guilds; owner prefix commands still work
+    # in DMs, where message content is always delivered.
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.dm_messages = True
+    return CacheProfile("minimal", intents, discord.MemberCacheFlags.none(),
+                        None, False)
+
+
+def _moderation():
+    # Members are cached as they show up rather than chunked at startup,
+    # and message content is kept only so `!sync` works in guild channels.
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.members = True
+    intents.moderation = True
+    intents.guild_messages = True
+    intents.dm_messages = True
+    intents.message_content = True
+    return CacheProfile("moderation", intents,
+                        discord.MemberCacheFlags.from_intents(intents), None,
+                        False)
+
+
+def _full():
+    intents = discord.Intents.all()
+    return CacheProfile("full", intents,
+                        discord.MemberCacheFlags.from_intents(intents), 1000,
+                        True)
+
+
+PROFILES = {
+    "minimal": _minimal,
+    "moderation": _moderation,
+    "full": _full,
+}
+
+
+def get_profile(name):
+    try:
+        return PROFILES[name.lower()]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown cache profile {name!r}, expected one of: "
+            f"{', '.join(PROFILES)}") from None
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import logging
+import os
+
+log = logging.getLogger("villager.sync")
+
+
+def command_hashes(tree, guild=None):
+    """Hash the sync payload of every command registered for `guild`."""
+    hashes = {}
+    for command in tree.get_commands(guild=guild):
+        payload = json.dumps(command.to_dict(tree), sort_keys=True,
+                             separators=(",", ":"), default=str)
+        hashes[command.name] = hashlib.sha256(payload.encode()).hexdigest()
+    return hashes
+
+
+def guild_scoped(tree):
+    """IDs of the guilds `tree` holds guild-scoped commands for."""
+    # CommandTree has no public accessor for this
+    return list(tree._guild_commands)
+
+
+def digest(hashes):
+    combined = "".join(f"{name}:{hashes[name]}" for name in sorted(hashes))
+    return hashlib.sha256(combined.encode()).hexdigest()
+
+
+class CommandManifest:
+    """Command hashes from the last successful sync, one entry per target.
+
+    Targets are "global" or a guild ID, stored as strings so the file
+    round-trips through JSON unchanged.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._targets = {}
+        try:
+            with open(path) as f:
+                self._targets = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            log.warning("Ignoring unreadable command manifest %s: %s", path, e)
+
+    def is_current(self, target, hashes):
+        entry = self._targets.get(str(target))
+        return entry is not None and entry["digest"] == digest(hashes)
+
+    def diff(self, target, hashes):
+        old = self._targets.get(str(target), {}).get("commands", {})
+        return {
+            "added": sorted(hashes.keys() - old.keys()),
+            "removed": sorted(old.keys() - hashes.keys()),
+            "changed": sorted(name for name in hashes.keys() & old.keys()
+                              if hashes[name] != old[name]),
+        }
+
+    def record(self, target, hashes):
+        self._targets[str(target)] = {
+            "digest": digest(hashes),
+            "commands": hashes,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._targets, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
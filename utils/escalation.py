@@ -0,0 +1,105 @@
+import json
+from datetime import timedelta
+from typing import NamedTuple, Optional
+
+ACTIONS = ("timeout", "kick", "ban")
+MAX_TIMEOUT = timedelta(days=28)
+
+# Same ladder the bot has always used: 2-4 warns time out, 5 bans
+DEFAULT_POLICY = {
+    "window_days": 7,
+    "steps": [
+        {"warnings": 2, "action": "timeout", "days": 1},
+        {"warnings": 3, "action": "timeout", "days": 7},
+        {"warnings": 4, "action": "timeout", "days": 3},
+        {"warnings": 5, "action": "ban"},
+    ],
+}
+
+
+def format_duration(delta):
+    if delta.days and not delta.seconds:
+        return f"{delta.days} day(s)"
+    if delta.total_seconds() % 3600 == 0:
+        return f"{int(delta.total_seconds() // 3600)} hour(s)"
+    return f"{int(delta.total_seconds() // 60)} minute(s)"
+
+
+class Step(NamedTuple):
+    action: str
+    duration: Optional[timedelta] = None
+
+
+class Policy:
+    """An escalation ladder compiled into a table indexed by warn count."""
+
+    __slots__ = ("window", "table")
+
+    def __init__(self, window, table):
+        self.window = window
+        self.table = table
+
+    def lookup(self, warnings):
+        if 0 <= warnings < len(self.table):
+            return self.table[warnings]
+        return None
+
+
+def compile_policy(spec):
+    window = timedelta(days=spec.get("window_days", 7)).total_seconds()
+    if window <= 0:
+        raise ValueError("window_days must be positive")
+    steps = {}
+    for raw in spec.get("steps", []):
+        warnings = int(raw["warnings"])
+        action = raw["action"]
+        if warnings < 1:
+            raise ValueError(f"Invalid warning threshold {warnings}")
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown escalation action '{action}'")
+        if warnings in steps:
+            raise ValueError(f"Duplicate step for {warnings} warning(s)")
+        duration = None
+        if action == "timeout":
+            duration = timedelta(days=raw.get("days", 0),
+                                 hours=raw.get("hours", 0),
+                                 minutes=raw.get("minutes", 0))
+            if not timedelta(0) < duration <= MAX_TIMEOUT:
+                raise ValueError(
+                    f"Timeout for {warnings} warning(s) must be between 0 and 28 days")
+        steps[warnings] = Step(action, duration)
+    table = [None] * (max(steps, default=0) + 1)
+    for warnings, step in steps.items():
+        table[warnings] = step
+    return Policy(window, tuple(table))
+
+
+class EscalationPolicies:
+    """Per-guild escalation policies loaded from a JSON file.
+
+    The file holds a "default" policy and an optional "guilds" mapping of
+    guild ID to policy. Guilds without their own policy use the default.
+    A missing file means DEFAULT_POLICY for everyone.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.default = compile_policy(DEFAULT_POLICY)
+        self._guilds = {}
+
+    def for_guild(self, guild_id):
+        return self._guilds.get(guild_id, self.default)
+
+    def load(self):
+        """(Re)load the policy file, keeping the current policies on error."""
+        try:
+            with open(self.path) as f:
+                spec = json.load(f)
+        except FileNotFoundError:
+            spec = {}
+        default = compile_policy(spec.get("default", DEFAULT_POLICY))
+        guilds = {
+            int(guild_id): compile_policy(guild_spec)
+            for guild_id, guild_spec in spec.get("guilds", {}).items()
+        }
+        self.default, self._guilds = default, guilds
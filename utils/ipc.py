@@ -0,0 +1,346 @@
+import asyncio
+import itertools
+import logging
+import marshal
+import os
+import socket
+import struct
+
+log = logging.getLogger("villager.ipc")
+
+# Frames are a 4 byte big-endian length followed by a marshal payload.
+# marshal is fast and compact but only safe between processes running
+# the same Python, which the launcher guarantees.
+HEADER = struct.Struct(">I")
+MAX_FRAME = 16 * 2**20
+
+
+async def _read_message(reader):
+    (size, ) = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if size > MAX_FRAME:
+        raise ValueError(f"IPC frame of {size} bytes is too large")
+    return marshal.loads(await reader.readexactly(size))
+
+
+class _Connection:
+    """Writes framed messages, coalescing everything sent in one loop
+    iteration into a single write."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self._pending = []
+        self._scheduled = False
+        self.messages = 0
+        self.writes = 0
+
+    def send(self, message):
+        payload = marshal.dumps(message)
+        self._pending.append(HEADER.pack(len(payload)))
+        self._pending.append(payload)
+        self.messages += 1
+        if not self._scheduled:
+            self._scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+
+    def _flush(self):
+        self._scheduled = False
+        pending, self._pending = self._pending, []
+        if not self.writer.is_closing():
+            self.writer.write(b"".join(pending))
+            self.writes += 1
+
+    def close(self):
+        self.writer.close()
+
+
+class IPCBroker:
+    """Routes messages between cluster workers over a Unix socket.
+
+    "request" and "broadcast" messages go to every other worker; the
+    sender of a request gets an "ack" with the number of peers it reached
+    so it knows how many responses to wait for. "response" messages go
+    back to the worker named in "dst".
+
+    The broker also hands out IDENTIFY slots, since Discord's identify
+    rate limit is per bot, not per process: shards share a bucket when
+    their IDs are equal modulo `max_concurrency`, and each bucket is
+    granted at most once every `identify_interval` seconds.
+    """
+
+    def __init__(self, path, max_concurrency=1, identify_interval=5.0):
+        self.path = path
+        self.max_concurrency = max_concurrency
+        self.identify_interval = identify_interval
+        self._clients = {}
+        self._handlers = set()
+        self._grants = set()
+        self._identify_locks = {}
+        self._last_identify = {}
+        self._server = None
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        # Bound owner-only from the start, a chmod after binding would
+        # leave a window where anyone can connect
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)
+        try:
+            sock.bind(self.path)
+        except OSError:
+            sock.close()
+            raise
+        finally:
+            os.umask(umask)
+        self._server = await asyncio.start_unix_server(self._handle,
+                                                       sock=sock)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for task in self._grants:
+            task.cancel()
+        for connection in self._clients.values():
+            connection.close()
+        if self._handlers:
+            await asyncio.wait(self._handlers)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def _handle(self, reader, writer):
+        connection = _Connection(writer)
+        cluster_id = None
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            while True:
+                message = await _read_message(reader)
+                op = message["op"]
+                if op == "hello":
+                    cluster_id = message["src"]
+                    self._clients[cluster_id] = connection
+                elif op in ("request", "broadcast"):
+                    peers = [
+                        peer for peer_id, peer in self._clients.items()
+                        if peer_id != message["src"]
+                    ]
+                    for peer in peers:
+                        peer.send(message)
+                    if op == "request":
+                        connection.send({
+                            "op": "ack",
+                            "id": message["id"],
+                            "peers": len(peers)
+                        })
+                elif op == "response":
+                    target = self._clients.get(message["dst"])
+                    if target is not None:
+                        target.send(message)
+                elif op == "identify":
+                    grant = asyncio.create_task(
+                        self._grant_identify(connection, message))
+                    self._grants.add(grant)
+                    grant.add_done_callback(self._grants.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError as e:
+            log.warning("Dropping IPC connection from cluster %s: %s",
+                        cluster_id, e)
+        finally:
+            if self._clients.get(cluster_id) is connection:
+                del self._clients[cluster_id]
+            self._handlers.discard(task)
+            connection.close()
+
+
+    async def _grant_identify(self, connection, message):
+        bucket = message["shard_id"] % self.max_concurrency
+        lock = self._identify_locks.setdefault(bucket, asyncio.Lock())
+        loop = asyncio.get_running_loop()
+        async with lock:
+            last = self._last_identify.get(bucket)
+            if last is not None:
+                delay = last + self.identify_interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            self._last_identify[bucket] = loop.time()
+        connection.send({"op": "grant", "id": message["id"]})
+
+
+class _PendingRequest:
+    __slots__ = ("expected", "responses", "done")
+
+    def __init__(self):
+        self.expected = None
+        self.responses = []
+        self.done = asyncio.get_running_loop().create_future()
+
+    def check(self):
+        if (self.expected is not None
+                and len(self.responses) >= self.expected
+                and not self.done.done()):
+            self.done.set_result(None)
+
+
+class IPCClient:
+    """A cluster worker's connection to the launcher's IPCBroker."""
+
+    def __init__(self, path, cluster_id, reconnect_delay=5.0):
+        self.path = path
+        self.cluster_id = cluster_id
+        self.reconnect_delay = reconnect_delay
+        self._handlers = {}
+        self._pending = {}
+        self._identifies = {}
+        self._ids = itertools.count()
+        self._connection = None
+        self._connected = asyncio.Event()
+        self._task = None
+
+    def on(self, name, handler):
+        """Answer requests and broadcasts called `name` with `handler(data)`."""
+        self._handlers[name] = handler
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except OSError as e:
+                log.warning("Failed to connect to IPC broker at %s: %s",
+                            self.path, e)
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+            connection = self._connection = _Connection(writer)
+            connection.send({"op": "hello", "src": self.cluster_id})
+            self._connected.set()
+            try:
+                while True:
+                    self._dispatch(await _read_message(reader))
+            except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+                log.warning("Lost connection to IPC broker, reconnecting")
+            finally:
+                self._connection = None
+                self._connected.clear()
+                connection.close()
+                # Don't hold shards back on a broker that's gone
+                for waiter in self._identifies.values():
+                    if not waiter.done():
+                        waiter.set_result(False)
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _dispatch(self, message):
+        op = message["op"]
+        if op == "grant":
+            waiter = self._identifies.get(message["id"])
+            if waiter is not None and not waiter.done():
+                waiter.set_result(True)
+        elif op == "ack":
+            pending = self._pending.get(message["id"])
+            if pending is not None:
+                pending.expected = message["peers"]
+                pending.check()
+        elif op == "response":
+            pending = self._pending.get(message["id"])
+            if pending is not None:
+                pending.responses.append(message)
+                pending.check()
+        elif op in ("request", "broadcast"):
+            asyncio.create_task(self._answer(message))
+
+    async def _answer(self, message):
+        handler = self._handlers.get(message["name"])
+        result = error = None
+        if handler is None:
+            error = f"No handler for '{message['name']}'"
+        else:
+            try:
+                result = await handler(message["data"])
+            except Exception as e:
+                log.exception("IPC handler '%s' failed", message["name"])
+                error = str(e)
+        if message["op"] == "request" and self._connection is not None:
+            self._connection.send({
+                "op": "response",
+                "id": message["id"],
+                "src": self.cluster_id,
+                "dst": message["src"],
+                "data": result,
+                "error": error,
+            })
+
+    async def request(self, name, data=None, timeout=5.0):
+        """Ask every other worker and collect their responses.
+
+        Returns whatever arrived within `timeout` as a list of
+        {"src", "data", "error"} dicts.
+        """
+        if self._connection is None:
+            return []
+        request_id = next(self._ids)
+        pending = self._pending[request_id] = _PendingRequest()
+        self._connection.send({
+            "op": "request",
+            "id": request_id,
+            "src": self.cluster_id,
+            "name": name,
+            "data": data,
+        })
+        try:
+            await asyncio.wait_for(pending.done, timeout)
+        except asyncio.TimeoutError:
+            log.warning("IPC request '%s' timed out with %d of %s response(s)",
+                        name, len(pending.responses), pending.expected)
+        finally:
+            del self._pending[request_id]
+        return [{
+            "src": response["src"],
+            "data": response["data"],
+            "error": response["error"],
+        } for response in pending.responses]
+
+    async def identify(self, shard_id, connect_timeout=5.0):
+        """Wait for the broker to grant `shard_id` an IDENTIFY slot.
+
+        Returns False without a grant if the broker can't be reached, the
+        caller should then fall back to pacing identifies itself.
+        """
+        try:
+            await asyncio.wait_for(self._connected.wait(), connect_timeout)
+        except asyncio.TimeoutError:
+            return False
+        request_id = next(self._ids)
+        waiter = self._identifies[request_id] = (
+            asyncio.get_running_loop().create_future())
+        self._connection.send({
+            "op": "identify",
+            "id": request_id,
+            "src": self.cluster_id,
+            "shard_id": shard_id,
+        })
+        try:
+            return await waiter
+        finally:
+            del self._identifies[request_id]
+
+    def broadcast(self, name, data=None):
+        if self._connection is not None:
+            self._connection.send({
+                "op": "broadcast",
+                "src": self.cluster_id,
+                "name": name,
+                "data": data,
+            })
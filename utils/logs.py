@@ -0,0 +1,109 @@
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc)
+                  .isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of INFO/DEBUG records from noisy loggers.
+
+    Rates are matched on the logger name and its parents, so a rate for
+    "villager.commands" also covers "villager.commands.warn". Warnings
+    and errors always get through.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        name = record.name
+        while name:
+            rate = self.rates.get(name)
+            if rate is not None:
+                return random.random() < rate
+            name = name.rpartition(".")[0]
+        return True
+
+
+class _PreparedQueueHandler(QueueHandler):
+    # The stock handler formats the whole record on the calling thread;
+    # only merge the message args here and leave formatting to the
+    # listener thread.
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _parse_pairs(spec, convert):
+    pairs = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        pairs[name.strip()] = convert(value.strip())
+    return pairs
+
+
+def setup_logging(level="INFO", levels="", sample_rates="", fmt="json"):
+    """Route all logging through a queue drained by a background thread.
+
+    `levels` and `sample_rates` are comma separated name=value lists,
+    e.g. "discord=WARNING,villager.warns=DEBUG" and
+    "villager.commands=0.1". Returns the listener so it can be stopped
+    (and flushed) on shutdown.
+    """
+    if fmt == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            "%(asctime)s %(levelname)-8s %(name)s: %(message)s")
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    handler = _PreparedQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(_parse_pairs(sample_rates, float)))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level.upper())
+    for name, value in _parse_pairs(levels, str.upper).items():
+        logging.getLogger(name).setLevel(value)
+
+    listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+log = logging.getLogger("villager.loop")
+
+_ASYNCIO_DIR = asyncio.__path__[0]
+
+
+def _format_blocking_stack(frame):
+    # Frames above the last asyncio frame are just the loop machinery
+    stack = traceback.extract_stack(frame)
+    start = max((i + 1 for i, entry in enumerate(stack)
+                 if entry.filename.startswith(_ASYNCIO_DIR)), default=0)
+    return "".join(traceback.format_list(stack[start:] or stack))
+
+
+class LoopMonitor:
+    """Measure event loop lag and catch callbacks that block the loop.
+
+    A task sleeps for `interval` and records how late it wakes up. A
+    watchdog thread watches that heartbeat; when the loop hasn't come
+    back for `threshold` seconds past its due time, it grabs the loop
+    thread's stack, which is the code doing the blocking.
+    """
+
+    def __init__(self, interval=0.5, threshold=0.1, log_interval=60.0,
+                 samples=1200):
+        self.interval = interval
+        self.threshold = threshold
+        self.log_interval = log_interval
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self._samples = deque(maxlen=samples)
+        self.slow_callbacks = 0
+        self.last_slow_stack = None
+        self._suppressed = 0
+        self._last_log = 0.0
+        self._heartbeat = time.monotonic()
+        self._task = None
+        self._watchdog = None
+        self._stopping = threading.Event()
+        self._loop_thread_id = None
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run())
+        self._watchdog = threading.Thread(target=self._watch,
+                                          name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def percentiles(self, *qs):
+        ordered = sorted(self._samples)
+        if not ordered:
+            return [0.0] * len(qs)
+        last = len(ordered) - 1
+        return [ordered[min(last, int(q * len(ordered)))] for q in qs]
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self._heartbeat = time.monotonic()
+            self.lag = max(0.0, time.perf_counter() - expected)
+            self._samples.append(self.lag)
+            if self.lag > self.max_lag:
+                self.max_lag = self.lag
+
+    def _watch(self):
+        reported_beat = None
+        while not self._stopping.wait(self.threshold / 2):
+            beat = self._heartbeat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled < self.threshold or beat == reported_beat:
+                continue
+            reported_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self.slow_callbacks += 1
+            self.last_slow_stack = _format_blocking_stack(frame)
+            self._report(stalled)
+
+    def _report(self, stalled):
+        now = time.monotonic()
+        if now - self._last_log < self.log_interval:
+            self._suppressed += 1
+            return
+        suppressed, self._suppressed = self._suppressed, 0
+        self._last_log = now
+        log.warning(
+            "Event loop blocked for over %.0f ms, stack of the blocking "
+            "code:\n%s", stalled * 1000, self.last_slow_stack,
+            extra={"stalled_ms": round(stalled * 1000),
+                   "suppressed": suppressed})
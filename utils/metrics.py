@@ -0,0 +1,158 @@
+import contextvars
+import functools
+import logging
+import time
+from bisect import bisect_left
+
+import discord
+from discord import app_commands
+from discord.webhook.async_ import AsyncWebhookAdapter
+
+# High volume, so this logger is sampled by default (LOG_SAMPLE_RATES)
+log = logging.getLogger("villager.commands")
+
+# Upper bounds in seconds; the last bucket catches everything slower
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = contextvars.ContextVar("command_timing", default=None)
+
+
+class Histogram:
+    # Only ever touched from the event loop thread, so plain ints are
+    # enough and no locking is needed.
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self):
+        return {
+            "buckets": dict(zip(map(str, BUCKETS), self.counts)),
+            "overflow": self.counts[-1],
+            "count": self.count,
+            "sum": self.sum,
+        }
+
+
+class CommandStats:
+    __slots__ = ("total", "first_response", "rest_calls", "errors")
+
+    def __init__(self):
+        self.total = Histogram()
+        self.first_response = Histogram()
+        self.rest_calls = 0
+        self.errors = 0
+
+
+class _Timing:
+    __slots__ = ("started", "first_response", "rest_calls")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_response = None
+        self.rest_calls = 0
+
+
+class CommandMetrics:
+    def __init__(self):
+        self.commands = {}
+
+    def observe(self, name, timing, failed):
+        stats = self.commands.get(name)
+        if stats is None:
+            stats = self.commands[name] = CommandStats()
+        elapsed = time.perf_counter() - timing.started
+        stats.total.observe(elapsed)
+        if timing.first_response is not None:
+            stats.first_response.observe(timing.first_response -
+                                         timing.started)
+        stats.rest_calls += timing.rest_calls
+        stats.errors += failed
+        return elapsed
+
+    def snapshot(self):
+        return {
+            name: {
+                "total": stats.total.to_dict(),
+                "first_response": stats.first_response.to_dict(),
+                "rest_calls": stats.rest_calls,
+                "errors": stats.errors,
+            }
+            for name, stats in self.commands.items()
+        }
+
+
+class InstrumentedTree(app_commands.CommandTree):
+    """CommandTree that times every app command it dispatches."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = CommandMetrics()
+
+    # _call is the single entry point for every app command, success or
+    # failure, and runs in the task the handler itself runs in.
+    async def _call(self, interaction):
+        if interaction.type is discord.InteractionType.autocomplete:
+            return await super()._call(interaction)
+        timing = _Timing()
+        token = _current.set(timing)
+        try:
+            await super()._call(interaction)
+        finally:
+            _current.reset(token)
+            command = interaction.command
+            name = (command.qualified_name
+                    if command else interaction.data.get("name", "unknown"))
+            elapsed = self.metrics.observe(name, timing,
+                                           interaction.command_failed)
+            log.info("Handled /%s in %.1f ms", name, elapsed * 1000,
+                     extra={"command": name,
+                            "duration_ms": round(elapsed * 1000, 2),
+                            "rest_calls": timing.rest_calls,
+                            "failed": interaction.command_failed})
+
+
+def _count_requests(request):
+    @functools.wraps(request)
+    async def wrapper(self, route, *args, **kwargs):
+        timing = _current.get()
+        if timing is None:
+            return await request(self, route, *args, **kwargs)
+        timing.rest_calls += 1
+        result = await request(self, route, *args, **kwargs)
+        if timing.first_response is None and route.path.endswith("/callback"):
+            timing.first_response = time.perf_counter()
+        return result
+
+    wrapper.__instrumented__ = True
+    return wrapper
+
+
+def instrument_rest():
+    """Count REST calls made while an app command is running.
+
+    Bot endpoints go through HTTPClient and interaction responses through
+    the webhook adapter, so both request methods are wrapped.
+    """
+    for cls in (discord.http.HTTPClient, AsyncWebhookAdapter):
+        if not getattr(cls.request, "__instrumented__", False):
+            cls.request = _count_requests(cls.request)
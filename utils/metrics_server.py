@@ -0,0 +1,204 @@
+import asyncio
+
+from utils.metrics import BUCKETS
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Per-guild warn cache series are limited to the largest shards, one
+# series per guild would be thousands
+WARN_CACHE_TOP_GUILDS = 20
+# Report stats that go up and down, the rest only count up
+REPORT_GAUGES = ("queued", "capacity", "pending")
+
+
+def _escape(value):
+    return (str(value).replace("\\", "\\\\").replace('"', '\\"')
+            .replace("\n", "\\n"))
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(value)}"'
+                     for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+class Exposition:
+    """Builds the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._lines = []
+        self._declared = set()
+
+    def _declare(self, name, kind, help_text):
+        if name not in self._declared:
+            self._declared.add(name)
+            self._lines.append(f"# HELP {name} {help_text}")
+            self._lines.append(f"# TYPE {name} {kind}")
+
+    def gauge(self, name, help_text, value, labels=None):
+        self._declare(name, "gauge", help_text)
+        self._lines.append(f"{name}{_labels(labels)} {value}")
+
+    def counter(self, name, help_text, value, labels=None):
+        self._declare(name, "counter", help_text)
+        self._lines.append(f"{name}{_labels(labels)} {value}")
+
+    def histogram(self, name, help_text, histogram, labels=None):
+        self._declare(name, "histogram", help_text)
+        labels = labels or {}
+        cumulative = 0
+        for bound, count in zip(BUCKETS, histogram.counts):
+            cumulative += count
+            self._lines.append(
+                f"{name}_bucket{_labels({**labels, 'le': bound})} {cumulative}")
+        self._lines.append(
+            f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {histogram.count}")
+        self._lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+        self._lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+    def render(self):
+        return "\n".join(self._lines) + "\n"
+
+
+async def render_bot_metrics(bot):
+    out = Exposition()
+    for shard_id, latency in bot.latencies:
+        out.gauge("villager_gateway_latency_seconds",
+                  "Gateway heartbeat latency per shard.", latency,
+                  {"shard": shard_id})
+    monitor = bot.loop_monitor
+    out.gauge("villager_event_loop_lag_seconds",
+              "How late the last loop lag probe woke up.", monitor.lag)
+    for q, value in zip(("0.5", "0.95", "0.99"),
+                        monitor.percentiles(0.5, 0.95, 0.99)):
+        out.gauge("villager_event_loop_lag_quantile_seconds",
+                  "Recent loop lag percentiles.", value, {"quantile": q})
+    out.gauge("villager_event_loop_lag_max_seconds",
+              "Worst loop lag seen since startup.", monitor.max_lag)
+    out.counter("villager_slow_callbacks_total",
+                "Times the event loop was blocked past the threshold.",
+                monitor.slow_callbacks)
+    for phase, _, took in bot.startup.phases():
+        out.gauge("villager_startup_phase_seconds",
+                  "Time spent in each boot phase.", took, {"phase": phase})
+
+    # Each metric family has to be emitted as one contiguous group
+    commands = bot.tree.metrics.commands.items()
+    for name, stats in commands:
+        out.histogram("villager_command_duration_seconds",
+                      "Total app command handler time.", stats.total,
+                      {"command": name})
+    for name, stats in commands:
+        out.histogram("villager_command_first_response_seconds",
+                      "Time until the interaction was first responded to.",
+                      stats.first_response, {"command": name})
+    for name, stats in commands:
+        out.counter("villager_command_rest_calls_total",
+                    "REST calls made while handling app commands.",
+                    stats.rest_calls, {"command": name})
+    for name, stats in commands:
+        out.counter("villager_command_errors_total",
+                    "App command invocations that failed.", stats.errors,
+                    {"command": name})
+
+    actions = bot.actions.latencies.items()
+    for name, (calls, _, _, _) in actions:
+        out.counter("villager_action_calls_total", "Escalation actions run.",
+                    calls, {"action": name})
+    for name, (_, failures, _, _) in actions:
+        out.counter("villager_action_failures_total",
+                    "Escalation actions that failed after retries.", failures,
+                    {"action": name})
+    for name, (_, _, total, _) in actions:
+        out.counter("villager_action_duration_seconds_total",
+                    "Time spent in escalation actions, including retries.",
+                    total, {"action": name})
+    for name, (_, _, _, slowest) in actions:
+        out.gauge("villager_action_duration_max_seconds",
+                  "Slowest escalation action.", slowest, {"action": name})
+
+    out.gauge("villager_cached_guilds", "Guilds in the client cache.",
+              len(bot.guilds))
+    out.gauge("villager_cached_users", "Users in the client cache.",
+              len(bot.users))
+    out.gauge("villager_cached_messages", "Messages in the client cache.",
+              len(bot.cached_messages))
+    out.gauge("villager_warn_cache_users", "Users held in the warn cache.",
+              len(bot.warn_cache))
+    cache = bot.warn_cache
+    usage = sorted(((cache.memory_usage(guild_id), guild_id)
+                    for guild_id in cache.guilds()), reverse=True)
+    out.gauge("villager_warn_cache_bytes",
+              "Approximate memory held by the warn cache.",
+              sum(size for size, _ in usage))
+    for size, guild_id in usage[:WARN_CACHE_TOP_GUILDS]:
+        out.gauge("villager_warn_cache_guild_bytes",
+                  "Approximate warn cache memory of the largest guilds.",
+                  size, {"guild": guild_id})
+    for _, guild_id in usage[:WARN_CACHE_TOP_GUILDS]:
+        out.gauge("villager_warn_cache_guild_users",
+                  "Users in the warn cache of the largest guilds.",
+                  cache.users(guild_id), {"guild": guild_id})
+    out.gauge("villager_warn_cache_reclaimed",
+              "Warns reclaimed by the last cache sweep.",
+              bot.warn_cache.last_sweep["reclaimed"])
+    out.gauge("villager_warn_store_bytes", "Size of the warn store on disk.",
+              await bot.warn_store.size())
+
+    stats = bot.reports.stats
+    for key in REPORT_GAUGES:
+        out.gauge(f"villager_reports_{key}", f"Report pipeline {key}.",
+                  stats[key])
+    for key, value in stats.items():
+        if key not in REPORT_GAUGES:
+            out.counter(f"villager_reports_{key}_total",
+                        f"Report pipeline {key} since startup.", value)
+    return out.render()
+
+
+class MetricsServer:
+    """Minimal HTTP server for /metrics, running on the bot's event loop."""
+
+    def __init__(self, collect, host, port):
+        self._collect = collect
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host,
+                                                  self.port)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+            while (await asyncio.wait_for(reader.readline(), 5)) not in (
+                    b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            path = parts[1].split("?")[0] if len(parts) > 1 else ""
+            if parts[:1] != ["GET"]:
+                status, body, content_type = "405 Method Not Allowed", "", "text/plain"
+            elif path == "/metrics":
+                status, body, content_type = "200 OK", await self._collect(), CONTENT_TYPE
+            elif path == "/":
+                status, body, content_type = "200 OK", "OK\n", "text/plain"
+            else:
+                status, body, content_type = "404 Not Found", "", "text/plain"
+            payload = body.encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n"
+                .encode() + payload)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
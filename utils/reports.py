@@ -0,0 +1,159 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+
+log = logging.getLogger("villager.reports")
+
+MESSAGE_LIMIT = 2000
+
+
+class _Report:
+    __slots__ = ("key", "author", "issue", "count")
+
+    def __init__(self, key, author, issue):
+        self.key = key
+        self.author = author
+        self.issue = issue
+        self.count = 1
+
+    def render(self):
+        line = f"• {self.author} said: '{self.issue}'"
+        if self.count > 1:
+            line += f" (x{self.count})"
+        if len(line) > MESSAGE_LIMIT:
+            line = line[:MESSAGE_LIMIT - 1] + "…"
+        return line
+
+
+class ReportPipeline:
+    """Queue bug reports and deliver them to the developer as digests.
+
+    Identical reports are merged while pending and dropped for
+    `dedup_window` seconds after delivery. A batch is flushed once it
+    holds `flush_size` reports or its oldest report has waited
+    `flush_interval` seconds, whichever comes first.
+    """
+
+    def __init__(self, get_channel, max_queue=500, flush_size=20,
+                 flush_interval=30.0, dedup_window=3600.0):
+        self._get_channel = get_channel
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.dedup_window = dedup_window
+        self._pending = {}
+        self._recent = OrderedDict()
+        self._batch = []
+        self._task = None
+        self.submitted = 0
+        self.duplicates = 0
+        self.dropped = 0
+        self.delivered = 0
+        self.batches = 0
+        self.failed = 0
+
+    @property
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "capacity": self._queue.maxsize,
+            "pending": len(self._pending),
+            "submitted": self.submitted,
+            "duplicates": self.duplicates,
+            "dropped": self.dropped,
+            "delivered": self.delivered,
+            "batches": self.batches,
+            "failed": self.failed,
+        }
+
+    def submit(self, author, issue):
+        """Queue a report. Returns False if the queue is full."""
+        key = hashlib.sha1(issue.strip().lower().encode()).hexdigest()
+        now = time.monotonic()
+        while self._recent and next(iter(self._recent.values())) < now:
+            self._recent.popitem(last=False)
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            pending.count += 1
+            self.duplicates += 1
+            return True
+        if key in self._recent:
+            self.duplicates += 1
+            return True
+
+        report = _Report(key, author, issue)
+        try:
+            self._queue.put_nowait(report)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self._pending[key] = report
+        self.submitted += 1
+        return True
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the worker and deliver whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while not self._queue.empty():
+            self._batch.append(self._queue.get_nowait())
+        if self._batch:
+            await self._deliver()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._batch.append(await self._queue.get())
+            deadline = loop.time() + self.flush_interval
+            while len(self._batch) < self.flush_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    report = await asyncio.wait_for(self._queue.get(),
+                                                    timeout)
+                except asyncio.TimeoutError:
+                    break
+                self._batch.append(report)
+            await self._deliver()
+
+    def _digests(self, batch):
+        header = f"📬 {len(batch)} new bug report(s):"
+        message = header
+        for report in batch:
+            line = report.render()
+            if len(message) + 1 + len(line) > MESSAGE_LIMIT:
+                yield message
+                message = line
+            else:
+                message += "\n" + line
+        yield message
+
+    async def _deliver(self):
+        batch, self._batch = self._batch, []
+        expires_at = time.monotonic() + self.dedup_window
+        for report in batch:
+            self._pending.pop(report.key, None)
+            self._recent[report.key] = expires_at
+        try:
+            channel = await self._get_channel()
+            for digest in self._digests(batch):
+                await channel.send(digest)
+        except Exception as e:
+            self.failed += len(batch)
+            log.error("Failed to deliver %d bug report(s): %s", len(batch), e)
+            return
+        self.delivered += len(batch)
+        self.batches += 1
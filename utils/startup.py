@@ -0,0 +1,51 @@
+import time
+
+
+class StartupProfiler:
+    """Records when each boot phase finished, relative to `origin`.
+
+    Phases are marked once, in the order they complete; later marks of
+    the same phase (reconnects, extra shards) are ignored. Per-shard
+    gateway phases are kept separately since shards identify one after
+    another.
+    """
+
+    def __init__(self, origin=None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.marks = {}
+        self.shards = {}
+
+    def mark(self, phase):
+        if phase not in self.marks:
+            self.marks[phase] = time.perf_counter() - self.origin
+
+    def mark_shard(self, shard_id, phase):
+        phases = self.shards.setdefault(shard_id, {})
+        if phase not in phases:
+            phases[phase] = time.perf_counter() - self.origin
+        self.mark(phase)
+
+    def phases(self):
+        """Return [(phase, finished_at, took)], in seconds."""
+        phases = []
+        previous = 0.0
+        for phase, at in self.marks.items():
+            phases.append((phase, at, at - previous))
+            previous = at
+        return phases
+
+    def summary(self):
+        return {
+            "phases": {phase: round(took, 4)
+                       for phase, _, took in self.phases()},
+            "total": round(max(self.marks.values(), default=0.0), 4),
+            "shards": {
+                str(shard_id): {phase: round(at, 4)
+                                for phase, at in phases.items()}
+                for shard_id, phases in sorted(self.shards.items())
+            },
+        }
+
+    def describe(self):
+        return ", ".join(f"{phase} {took * 1000:.0f} ms"
+                         for phase, _, took in self.phases())
@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import time
+
+log = logging.getLogger("villager.cache")
+
+
+class CachedValue:
+    """A single value fetched from the API and kept for `ttl` seconds.
+
+    Readers never wait on the network once a value has been fetched: a
+    stale value is returned as-is while a refresh runs in the background.
+    """
+
+    def __init__(self, fetch, ttl):
+        self._fetch = fetch
+        self.ttl = ttl
+        self._value = None
+        self._expires_at = 0.0
+        self._refreshing = None
+        self._task = None
+
+    @property
+    def stale(self):
+        return time.monotonic() >= self._expires_at
+
+    async def _do_refresh(self):
+        value = await self._fetch()
+        self._value = value
+        self._expires_at = time.monotonic() + self.ttl
+        return value
+
+    def _refresh_done(self, future):
+        self._refreshing = None
+        if not future.cancelled() and future.exception() is not None:
+            log.warning("Failed to refresh cached value",
+                        exc_info=future.exception())
+
+    def _start_refresh(self):
+        # Concurrent callers share one in-flight fetch
+        if self._refreshing is None:
+            self._refreshing = asyncio.ensure_future(self._do_refresh())
+            self._refreshing.add_done_callback(self._refresh_done)
+        return self._refreshing
+
+    async def refresh(self):
+        return await asyncio.shield(self._start_refresh())
+
+    async def get(self):
+        if self._value is None:
+            return await self.refresh()
+        if self.stale:
+            self._start_refresh()
+        return self._value
+
+    def start(self):
+        """Refresh the value every `ttl` seconds until stopped."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.ttl)
+            try:
+                await self.refresh()
+            except Exception:
+                pass  # Already logged by _refresh_done, keep the old value
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,129 @@
+import asyncio
+import sys
+import time
+from collections import OrderedDict, deque
+
+_FLOAT_SIZE = sys.getsizeof(0.0)
+
+
+class WarnCache:
+    """Active warnings kept in memory, sharded by guild then user.
+
+    Every deque is sorted by issue time, so expiring only ever pops from
+    the left and stops at the first warn that is still live. Each guild
+    shard is an LRU capped at `max_users`; evicted users are simply
+    reloaded from the store on their next lookup.
+    """
+
+    def __init__(self, max_users=None):
+        self.max_users = max_users
+        self._guilds = {}
+        self.last_sweep = {"reclaimed": 0, "dropped_keys": 0, "duration": 0.0}
+
+    def __len__(self):
+        return sum(len(shard) for shard in self._guilds.values())
+
+    def guilds(self):
+        return list(self._guilds)
+
+    def get(self, guild_id, user_id, cutoff):
+        """Return warns issued at or after `cutoff`, or None if not loaded."""
+        shard = self._guilds.get(guild_id)
+        if shard is None:
+            return None
+        warns = shard.get(user_id)
+        if warns is None:
+            return None
+        shard.move_to_end(user_id)
+        if warns and warns[0] < cutoff:
+            popleft = warns.popleft
+            while warns and warns[0] < cutoff:
+                popleft()
+        return warns
+
+    def load(self, guild_id, user_id, timestamps):
+        shard = self._guilds.get(guild_id)
+        if shard is None:
+            shard = self._guilds[guild_id] = OrderedDict()
+        # Keep whatever is already cached; a concurrent writer may have
+        # appended to it while the backend query was in flight.
+        warns = shard.get(user_id)
+        if warns is None:
+            if self.max_users and len(shard) >= self.max_users:
+                shard.popitem(last=False)
+            warns = shard[user_id] = deque(timestamps)
+        return warns
+
+    def remove_latest(self, guild_id, user_id, amount):
+        shard = self._guilds.get(guild_id)
+        warns = shard.get(user_id) if shard is not None else None
+        if warns is None:
+            return
+        for _ in range(min(amount, len(warns))):
+            warns.pop()
+        if not warns:
+            del shard[user_id]
+
+    def clear(self, guild_id, user_id=None):
+        if user_id is None:
+            self._guilds.pop(guild_id, None)
+            return
+        shard = self._guilds.get(guild_id)
+        if shard is not None:
+            shard.pop(user_id, None)
+
+    def users(self, guild_id):
+        shard = self._guilds.get(guild_id)
+        return len(shard) if shard is not None else 0
+
+    def memory_usage(self, guild_id):
+        """Approximate bytes held by one guild's shard."""
+        shard = self._guilds.get(guild_id)
+        if shard is None:
+            return 0
+        size = sys.getsizeof(shard)
+        for warns in shard.values():
+            size += sys.getsizeof(warns) + len(warns) * _FLOAT_SIZE
+        return size
+
+    async def sweep(self, cutoff_for, time_slice=0.002, batch=256):
+        """Drop expired warns for every cached user.
+
+        `cutoff_for(guild_id)` gives the oldest issue time still live in
+        that guild.
+
+        Yields back to the event loop whenever a slice has run for longer
+        than `time_slice` seconds, so a large cache is swept over many
+        loop iterations instead of one long stall.
+        """
+        started = time.perf_counter()
+        reclaimed = dropped = 0
+        slice_start = time.perf_counter()
+        for guild_id in list(self._guilds):
+            shard = self._guilds.get(guild_id)
+            if shard is None:
+                continue
+            cutoff = cutoff_for(guild_id)
+            keys = list(shard)
+            for i in range(0, len(keys), batch):
+                for key in keys[i:i + batch]:
+                    warns = shard.get(key)
+                    if warns is None:
+                        continue
+                    while warns and warns[0] < cutoff:
+                        warns.popleft()
+                        reclaimed += 1
+                    if not warns:
+                        del shard[key]
+                        dropped += 1
+                if time.perf_counter() - slice_start >= time_slice:
+                    await asyncio.sleep(0)
+                    slice_start = time.perf_counter()
+            if not shard and self._guilds.get(guild_id) is shard:
+                del self._guilds[guild_id]
+        self.last_sweep = {
+            "reclaimed": reclaimed,
+            "dropped_keys": dropped,
+            "duration": time.perf_counter() - started,
+        }
+        return self.last_sweep
@@ -0,0 +1,263 @@
+import asyncio
+import sqlite3
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Keeps IN (...) lists well under SQLite's bound-parameter limit
+BATCH_SIZE = 500
+
+
+def _placeholders(values):
+    return ", ".join("?" * len(values))
+
+
+class WarnStore(ABC):
+    """Persistent warning storage.
+
+    Timestamps are POSIX seconds. Backends must be safe to call from the
+    event loop, so anything blocking has to be pushed off it.
+    """
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def size(self):
+        """Approximate storage size in bytes, 0 if unknown."""
+        return 0
+
+    @abstractmethod
+    async def add(self, guild_id, user_id, issued_at, reason=None):
+        ...
+
+    @abstractmethod
+    async def active(self, guild_id, user_id, since):
+        """Return issue times at or after `since`, oldest first."""
+
+    @abstractmethod
+    async def remove_latest(self, guild_id, user_id, amount, since):
+        """Delete the newest `amount` warns issued at or after `since`."""
+
+    # Bulk operations. Backends should override these with a single
+    # round trip; the defaults just loop over the per-user calls.
+
+    async def add_many(self, guild_id, user_ids, issued_at, reason=None):
+        for user_id in user_ids:
+            await self.add(guild_id, user_id, issued_at, reason)
+
+    async def active_many(self, guild_id, user_ids, since):
+        """Return {user_id: issue times} for several users at once."""
+        return {
+            user_id: await self.active(guild_id, user_id, since)
+            for user_id in user_ids
+        }
+
+    async def clear_many(self, guild_id, user_ids, since):
+        cleared = 0
+        for user_id in user_ids:
+            cleared += await self.clear(guild_id, since, user_id)
+        return cleared
+
+    @abstractmethod
+    async def clear(self, guild_id, since, user_id=None):
+        """Delete a guild's warns issued at or after `since`.
+
+        Limited to one user when `user_id` is given. Returns the number of
+        warns deleted.
+        """
+
+    @abstractmethod
+    async def summary(self, guild_id, since, limit):
+        """Return the `limit` most warned users and how many there are.
+
+        The users are (user_id, count) pairs, most warned first.
+        """
+
+    @abstractmethod
+    async def export(self, guild_id, limit):
+        """Return up to `limit` of a guild's warns and how many it has.
+
+        The warns are (user_id, issued_at, reason) rows.
+        """
+
+
+class SQLiteWarnStore(WarnStore):
+    # One connection owned by one worker thread: sqlite3 connections are
+    # not thread-safe and every query is serialized anyway.
+
+    def __init__(self, path):
+        self.path = path
+        self._db = None
+        self._executor = ThreadPoolExecutor(max_workers=1,
+                                            thread_name_prefix="warn-store")
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def _open(self):
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        # Cluster workers share the file; wait for their writes to finish
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS warns (
+                id INTEGER PRIMARY KEY,
+                guild_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                issued_at REAL NOT NULL,
+                reason TEXT
+            );
+            CREATE INDEX IF NOT EXISTS warns_lookup
+                ON warns (guild_id, user_id, issued_at);
+        """)
+
+    def _close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _add(self, guild_id, user_id, issued_at, reason):
+        with self._db:
+            self._db.execute(
+                "INSERT INTO warns (guild_id, user_id, issued_at, reason) "
+                "VALUES (?, ?, ?, ?)", (guild_id, user_id, issued_at, reason))
+
+    def _active(self, guild_id, user_id, since):
+        rows = self._db.execute(
+            "SELECT issued_at FROM warns "
+            "WHERE guild_id = ? AND user_id = ? AND issued_at >= ? "
+            "ORDER BY issued_at", (guild_id, user_id, since))
+        return [row[0] for row in rows]
+
+    def _remove_latest(self, guild_id, user_id, amount, since):
+        with self._db:
+            cur = self._db.execute(
+                "DELETE FROM warns WHERE id IN ("
+                "SELECT id FROM warns "
+                "WHERE guild_id = ? AND user_id = ? AND issued_at >= ? "
+                "ORDER BY issued_at DESC LIMIT ?)",
+                (guild_id, user_id, since, amount))
+        return cur.rowcount
+
+    def _clear(self, guild_id, since, user_id):
+        with self._db:
+            if user_id is None:
+                cur = self._db.execute(
+                    "DELETE FROM warns WHERE guild_id = ? AND issued_at >= ?",
+                    (guild_id, since))
+            else:
+                cur = self._db.execute(
+                    "DELETE FROM warns "
+                    "WHERE guild_id = ? AND user_id = ? AND issued_at >= ?",
+                    (guild_id, user_id, since))
+        return cur.rowcount
+
+    def _add_many(self, guild_id, user_ids, issued_at, reason):
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO warns (guild_id, user_id, issued_at, reason) "
+                "VALUES (?, ?, ?, ?)",
+                [(guild_id, user_id, issued_at, reason) for user_id in user_ids])
+
+    def _active_many(self, guild_id, user_ids, since):
+        active = {user_id: [] for user_id in user_ids}
+        for i in range(0, len(user_ids), BATCH_SIZE):
+            batch = user_ids[i:i + BATCH_SIZE]
+            rows = self._db.execute(
+                "SELECT user_id, issued_at FROM warns "
+                f"WHERE guild_id = ? AND user_id IN ({_placeholders(batch)}) "
+                "AND issued_at >= ? ORDER BY issued_at",
+                (guild_id, *batch, since))
+            for user_id, issued_at in rows:
+                active[user_id].append(issued_at)
+        return active
+
+    def _clear_many(self, guild_id, user_ids, since):
+        cleared = 0
+        with self._db:
+            for i in range(0, len(user_ids), BATCH_SIZE):
+                batch = user_ids[i:i + BATCH_SIZE]
+                cur = self._db.execute(
+                    "DELETE FROM warns "
+                    f"WHERE guild_id = ? AND user_id IN ({_placeholders(batch)}) "
+                    "AND issued_at >= ?", (guild_id, *batch, since))
+                cleared += cur.rowcount
+        return cleared
+
+    def _size(self):
+        if self._db is None:
+            return 0
+        page_count = self._db.execute("PRAGMA page_count").fetchone()[0]
+        page_size = self._db.execute("PRAGMA page_size").fetchone()[0]
+        return page_count * page_size
+
+    def _summary(self, guild_id, since, limit):
+        rows = self._db.execute(
+            "SELECT user_id, COUNT(*) AS warnings FROM warns "
+            "WHERE guild_id = ? AND issued_at >= ? "
+            "GROUP BY user_id ORDER BY warnings DESC LIMIT ?",
+            (guild_id, since, limit)).fetchall()
+        total = self._db.execute(
+            "SELECT COUNT(DISTINCT user_id) FROM warns "
+            "WHERE guild_id = ? AND issued_at >= ?",
+            (guild_id, since)).fetchone()[0]
+        return rows, total
+
+    def _export(self, guild_id, limit):
+        rows = self._db.execute(
+            "SELECT user_id, issued_at, reason FROM warns "
+            "WHERE guild_id = ? ORDER BY user_id, issued_at LIMIT ?",
+            (guild_id, limit)).fetchall()
+        total = self._db.execute(
+            "SELECT COUNT(*) FROM warns WHERE guild_id = ?",
+            (guild_id, )).fetchone()[0]
+        return rows, total
+
+    async def open(self):
+        await self._run(self._open)
+
+    async def close(self):
+        # The gateway can close the bot while it's already closing
+        if self._db is None:
+            return
+        await self._run(self._close)
+        self._executor.shutdown(wait=False)
+
+    async def add(self, guild_id, user_id, issued_at, reason=None):
+        await self._run(self._add, guild_id, user_id, issued_at, reason)
+
+    async def active(self, guild_id, user_id, since):
+        return await self._run(self._active, guild_id, user_id, since)
+
+    async def remove_latest(self, guild_id, user_id, amount, since):
+        return await self._run(self._remove_latest, guild_id, user_id,
+                               amount, since)
+
+    async def clear(self, guild_id, since, user_id=None):
+        return await self._run(self._clear, guild_id, since, user_id)
+
+    async def summary(self, guild_id, since, limit):
+        return await self._run(self._summary, guild_id, since, limit)
+
+    async def export(self, guild_id, limit):
+        return await self._run(self._export, guild_id, limit)
+
+    async def add_many(self, guild_id, user_ids, issued_at, reason=None):
+        await self._run(self._add_many, guild_id, list(user_ids), issued_at,
+                        reason)
+
+    async def active_many(self, guild_id, user_ids, since):
+        return await self._run(self._active_many, guild_id, list(user_ids),
+                               since)
+
+    async def clear_many(self, guild_id, user_ids, since):
+        return await self._run(self._clear_many, guild_id, list(user_ids),
+                               since)
+
+    async def size(self):
+        return await self._run(self._size)
@@ -0,0 +1,62 @@
+class WarnLedger:
+    """Active warns, read through the cache and written to the store.
+
+    The store is the source of truth: writes go to it first and only
+    touch the cache once they've succeeded, so a failed write never
+    leaves a warn that counts toward escalation but was never saved.
+    `window_for(guild_id)` gives a guild's warn window in seconds.
+    """
+
+    def __init__(self, store, cache, window_for):
+        self.store = store
+        self.cache = cache
+        self.window_for = window_for
+
+    def cutoff(self, guild_id, now):
+        return now - self.window_for(guild_id)
+
+    async def active(self, guild_id, user_id, now):
+        cutoff = self.cutoff(guild_id, now)
+        warns = self.cache.get(guild_id, user_id, cutoff)
+        if warns is None:
+            timestamps = await self.store.active(guild_id, user_id, cutoff)
+            warns = self.cache.load(guild_id, user_id, timestamps)
+        return warns
+
+    async def active_many(self, guild_id, user_ids, now):
+        cutoff = self.cutoff(guild_id, now)
+        found = {}
+        missing = []
+        for user_id in user_ids:
+            warns = self.cache.get(guild_id, user_id, cutoff)
+            if warns is None:
+                missing.append(user_id)
+            else:
+                found[user_id] = warns
+        if missing:
+            loaded = await self.store.active_many(guild_id, missing, cutoff)
+            for user_id, timestamps in loaded.items():
+                found[user_id] = self.cache.load(guild_id, user_id,
+                                                 timestamps)
+        return found
+
+    async def add(self, guild_id, user_id, now, reason=None):
+        """Record a warn issued at `now` and return the user's active warns."""
+        warns = await self.active(guild_id, user_id, now)
+        await self.store.add(guild_id, user_id, now, reason)
+        warns.append(now)
+        return warns
+
+    async def add_many(self, guild_id, user_ids, now, reason=None):
+        """Record a warn for every user, returning {user_id: active warns}."""
+        warns = await self.active_many(guild_id, user_ids, now)
+        await self.store.add_many(guild_id, user_ids, now, reason)
+        for user_id in user_ids:
+            warns[user_id].append(now)
+        return warns
+
+    async def remove_latest(self, guild_id, user_id, amount, now):
+        removed = await self.store.remove_latest(guild_id, user_id, amount,
+                                                 self.cutoff(guild_id, now))
+        self.cache.remove_latest(guild_id, user_id, removed)
+        return removed